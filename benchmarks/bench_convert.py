@@ -0,0 +1,63 @@
+"""
+Loading deep JSON payloads into resources.
+
+Compares converting the whole payload to native strings when it's assigned
+(what `Resource.raw_data` used to do) with converting only the values read
+through fields. Run from the repository root:
+
+    python benchmarks/bench_convert.py
+"""
+
+import json
+import timeit
+
+from drf_client import fields
+from drf_client.resources import Resource
+from drf_client.utils import convert_from_utf8
+
+
+class Record(Resource):
+    _route = "records"
+
+    name = fields.Field()
+    tree = fields.Field()
+
+
+def make_tree(depth, width):
+    if not depth:
+        return {u"label": u"leaf", u"value": 1.5, u"tags": [u"a", u"b"]}
+    return {u"label": u"node {0}".format(depth),
+            u"children": [make_tree(depth - 1, width) for _ in range(width)]}
+
+
+def make_payload(depth, width):
+    data = {u"id": 1, u"name": u"record", u"tree": make_tree(depth, width)}
+    # Round trip so the payload is made of unicode, as parsed responses are.
+    return json.loads(json.dumps(data))
+
+
+def eager(payload):
+    record = Record(data=convert_from_utf8(payload))
+    return record.name
+
+
+def lazy(payload):
+    record = Record(data=payload)
+    return record.name
+
+
+def main():
+    for depth, width in [(3, 4), (5, 4), (7, 3)]:
+        payload = make_payload(depth, width)
+        number = 20
+        results = []
+        for func in (eager, lazy):
+            seconds = min(timeit.repeat(lambda: func(payload),
+                                        number=number, repeat=3))
+            results.append(seconds / number * 1000)
+        print("depth={0} width={1}: eager {2:.3f}ms, lazy {3:.3f}ms per load"
+              .format(depth, width, *results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Decoding list pages with each installed JSON backend.
+
+Builds a paginated response of a few megabytes and reports the decode
+throughput of every backend `drf_client.codec` can use. Run from the
+repository root:
+
+    python benchmarks/bench_json.py
+"""
+
+import json
+import timeit
+
+from drf_client import codec
+
+
+def make_page(count):
+    results = [{"id": pk,
+                "name": u"Project {0} caf\xe9".format(pk),
+                "created": "2015-01-17T01:53:36Z",
+                "score": pk * 0.25,
+                "active": pk % 2 == 0,
+                "tags": ["alpha", "beta", "gamma"],
+                "owner": {"id": pk % 50, "email": "user{0}@example.com".format(pk)}}
+               for pk in range(count)]
+    return json.dumps({"count": count, "next": None, "previous": None,
+                       "results": results})
+
+
+def main():
+    content = make_page(20000)
+    megabytes = len(content) / 1024.0 / 1024.0
+    print("page of {0:.1f}MB".format(megabytes))
+    for name in codec.available_backends():
+        backend = codec.load_backend(name)
+        seconds = min(timeit.repeat(lambda: backend.decode(content),
+                                    number=5, repeat=3)) / 5
+        print("{0:>10}: {1:.1f}ms per page, {2:.1f}MB/s".format(
+            name, seconds * 1000, megabytes / seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Memory used by loaded resources.
+
+Loads the same records into resources stored as dicts and as compact
+records (`Resource.COMPACT`), each in a fresh process, and reports the
+growth of its resident memory. The "baseline" layout stores them as
+resources did before either: attributes in an instance __dict__ and a
+copy of the data with every string converted to UTF-8 bytes. Run from the
+repository root:
+
+    python benchmarks/bench_memory.py [count]
+"""
+
+import gc
+import json
+import resource
+import subprocess
+import sys
+
+from drf_client import fields, settings
+from drf_client.resources import Resource
+from drf_client.utils import convert_from_utf8
+
+
+class Project(Resource):
+    _route = "projects"
+
+    name = fields.Field()
+    status = fields.Field()
+    created = fields.DateTimeField()
+    owner = fields.Field()
+
+
+class CompactProject(Project):
+    COMPACT = True
+
+
+class BaselineProject(Project):
+    # No __slots__, so instances get a __dict__ like they used to.
+
+    def __init__(self, *args, **kwargs):
+        super(BaselineProject, self).__init__(*args, **kwargs)
+        # The attributes a resource used to keep in its __dict__.
+        for name in ("required", "_field_name", "_source", "_id",
+                     "_data_store", "_last_loaded", "_parent"):
+            self.__dict__[name] = getattr(self, name)
+
+    @Project.raw_data.setter
+    def raw_data(self, data):
+        Resource.raw_data.fset(self, convert_from_utf8(data))
+
+
+LAYOUTS = {"baseline": BaselineProject, "dict": Project,
+           "compact": CompactProject}
+
+
+def make_rows(count):
+    """Yield the decoded rows one at a time, as parsed responses would."""
+    for pk in xrange(count):
+        row = json.dumps({"id": pk,
+                          "name": "Project {0}".format(pk),
+                          "status": "active" if pk % 3 else "archived",
+                          "created": "2015-01-17T01:53:36Z",
+                          "owner": {"id": pk % 100, "email": "user@example.com"}})
+        yield json.loads(row)
+
+
+def max_rss():
+    """The peak resident memory of this process, in megabytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def measure(layout, count):
+    cls = LAYOUTS[layout]
+    # Keep the shared cache from holding on to the data as well.
+    settings.CACHE_MAX_ENTRIES = 0
+    gc.collect()
+    before = max_rss()
+    resources = [cls(data=row) for row in make_rows(count)]
+    for project in resources[:100]:
+        project.name, project.created
+    gc.collect()
+    print(max_rss() - before)
+
+
+def main(count):
+    for layout in sorted(LAYOUTS):
+        output = subprocess.check_output(
+            [sys.executable, __file__, layout, str(count)])
+        megabytes = float(output)
+        print("{0:>8}: {1:.1f}MB for {2} resources, {3:.0f} bytes each".format(
+            layout, megabytes, count, megabytes * 1024 * 1024 / count))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        measure(sys.argv[1], int(sys.argv[2]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -8,6 +8,7 @@ __version__ = '0.1.0'
 def configure(filepath=None, username=None, password=None, token=None):
     import yaml
     from . import settings
+    from .client import reset_default_client
 
     with open(filepath, 'r') as config_file:
         config = yaml.load(config_file)
@@ -17,6 +18,8 @@ def configure(filepath=None, username=None, password=None, token=None):
 
     scheme = "https" if settings.USE_HTTPS else "http"
     settings.API_URL = "{0}://{1}".format(scheme, settings.HOST)
+    # Pick up any new pool settings on the next request.
+    reset_default_client()
     authenticate(username, password, token)
 
 
@@ -1,45 +1,81 @@
-import json
-import requests
-from drf_client import settings, utils
+from collections import OrderedDict, deque
+from itertools import islice
+from operator import itemgetter
 
+from drf_client import columns, utils
+from drf_client.client import get_default_client
+from drf_client.exceptions import APIException, BulkOperationError
 
-def request(method, url, **kwargs):
+
+def request(method, url, client=None, **kwargs):
     """Issue the request to the API using common headers and ssl settings.
 
+    Requests go through the client's pooled transport so that connections
+    to the API are kept alive and reused between calls.
+
     Arguments:
         method (str): The HTTP method to use for the request (e.g. "post")
         url (str): The address for the expected resource.
 
     Keyword Arguments:
+        client (Client): The client to issue the request with. Uses the
+            default client if not provided.
         params (dict): Data to provide as a parameter in the URL.
         data (dict): The data to apply to the request.
+        headers (dict): Additional headers to send with the request.
+        retry (bool): Retry this request on transient failures even if its
+            method isn't idempotent (e.g. a POST), or never retry it. See
+            `drf_client.retry`.
+
+    GETs identical to one already in flight (same URL, parameters, headers
+    and other arguments, so the same credentials) wait for it and share its
+    response instead of being sent again, unless the SINGLE_FLIGHT setting
+    is off or the response is streamed.
 
     Returns:
         Response object.
     """
+    client = client or get_default_client()
     try:
-        kwargs['data'] = json.dumps(kwargs['data'])
+        kwargs['data'] = client.codec.encode(kwargs['data'])
     except KeyError:
         # Not a big deal, just want it to be json if it's present.
         pass
 
-    request = getattr(requests, method.lower())
     headers = {"Content-Type": "application/json"}
-    headers.update(settings.AUTHENTICATION.get_header())
-    response = request(url, headers=headers,
-                       verify=settings.VERIFY_SSL, **kwargs)
-    return response
+    headers.update(client.authentication.get_header())
+    headers.update(kwargs.pop('headers', None) or {})
+    kwargs.update(headers=headers, verify=client.verify_ssl)
+    send = client.transport.request
+    if (method.lower() == "get" and not kwargs.get("stream") and
+            client.get_setting("SINGLE_FLIGHT")):
+        # Everything the request is sent with is part of the key, so that a
+        # response is never shared with a request sent differently (e.g.
+        # with other credentials or another timeout).
+        key = (url, _freeze(kwargs))
+        return client.single_flight.do(key, send, method, url, **kwargs)
+    return send(method, url, **kwargs)
+
+
+def _freeze(value):
+    """Return a hashable version of the value, the same for equal dicts."""
+    if hasattr(value, "items"):
+        return tuple(sorted((key, _freeze(item))
+                            for key, item in value.items()))
+    return repr(value)
 
 
-def get(cls, limit=settings.MAX_PAGINATION, offset=0, sort="", **params):
+def get(cls, limit=None, offset=0, sort="", client=None, **params):
     """Retrieve a set of resources from the API.
 
     Arguments:
         cls (Resource class): The resource type to retrieve
-        limit (int): The maximum number of results to return.
+        limit (int): The maximum number of results to return. Defaults to
+            the MAX_PAGINATION setting.
         offset (int): Specifies the starting point for resources.
             In other words, if there's an offset of 25, it would start
             returning the 26th resource (for example).
+        client (Client): The client to retrieve the resources with.
         params (kwargs): Any additional filters and expected values.
 
     For example, if you'd like to set a different offset and
@@ -60,17 +96,310 @@ def get(cls, limit=settings.MAX_PAGINATION, offset=0, sort="", **params):
     MAX_PAGINATION setting is specified for `limit`, it will be reset
     to the max setting.
     """
-    params['limit'] = utils.clamp(limit, maximum=settings.MAX_PAGINATION)
+    client = client or get_default_client()
+    if limit is None:
+        limit = client.max_pagination
+    params['limit'] = utils.clamp(limit, maximum=client.max_pagination)
     params['offset'] = utils.clamp(offset)
-    response = request("get", params=params, url=cls.get_collection_url())
-    return utils.parse_resources(cls, response)
+    response = request("get", params=params, client=client,
+                       url=cls.get_collection_url(client))
+    return utils.parse_resources(cls, response, client=client)
+
+
+def get_async(cls, callback=None, client=None, **kwargs):
+    """Retrieve a set of resources without blocking the caller.
+
+    The request runs on the client's worker pool, so many requests can be
+    in flight at once::
+
+        pending = [get_async(Foo, offset=offset) for offset in offsets]
+        pages = [result.get() for result in pending]
+
+    Arguments:
+        cls (Resource class): The resource type to retrieve
+        callback (callable): Called with the resources once they arrive.
+        client (Client): The client to retrieve the resources with.
+        kwargs: The same arguments as `get`.
+
+    Returns:
+        An `AsyncResult`; call `.get()` on it to wait for the resources.
+    """
+    kwargs['client'] = client
+    return _apply_async(client, get, (cls,), kwargs, callback)
+
+
+def iterate(cls, page_size=None, offset=0, prefetch=None, stream=False,
+            client=None, **params):
+    """Lazily retrieve every resource matching the filters, page by page.
+
+    Pages are only requested once the resources of the previous page have
+    been consumed, and each resource is handed over one at a time, so
+    memory use stays flat however large the collection is::
+
+        for foo in iterate(Foo, name="bar"):
+            process(foo)
+
+    When the first page includes DRF's `count`, the offsets of every
+    remaining page are known up front. The next `prefetch` pages are then
+    requested concurrently on the client's worker pool while the results
+    are still handed out in order.
+
+    With `stream`, pages are requested one after another instead, and each
+    result is decoded and handed out as soon as it has downloaded. Only
+    one result at a time is held in memory rather than a whole page.
+
+    Arguments:
+        cls (Resource class): The resource type to retrieve
+        page_size (int): The number of resources to request per page.
+            Defaults to (and is capped at) the MAX_PAGINATION setting.
+        offset (int): Specifies the starting point for resources.
+        prefetch (int): The maximum number of pages to request ahead of
+            the one being consumed. Defaults to the PREFETCH_PAGES setting,
+            0 disables prefetching.
+        stream (bool): Decode each page while it downloads. Prefetching
+            doesn't apply to streamed pages.
+        client (Client): The client to retrieve the resources with.
+        params (kwargs): Any additional filters and expected values.
+
+    Yields:
+        Resource instances, in the order the API returns them.
+    """
+    if stream:
+        for data in _stream_results(cls, page_size, offset, client, params):
+            yield cls(data=data, client=client)
+        return
+
+    pages = _iter_pages(cls, page_size, offset, prefetch, client, params)
+    for page in pages:
+        # Pop the raw data off the page as resources are handed out so a
+        # page is released while it's consumed rather than after.
+        page.reverse()
+        while page:
+            yield cls(data=page.pop(), client=client)
+
+
+def _stream_results(cls, page_size, offset, client, params):
+    """Yield the raw data of each result of the collection as it arrives."""
+    client = client or get_default_client()
+    offset = _set_page_limit(client, page_size, offset, params)
+    url = cls.get_collection_url(client)
+    chunk_size = client.get_setting("STREAM_CHUNK_SIZE")
+
+    while True:
+        page_params = dict(params, offset=offset)
+        response = request("get", params=page_params, client=client,
+                           url=url, stream=True)
+        try:
+            page = client.response_parser.stream_page(response, chunk_size)
+            returned = 0
+            for data in page:
+                returned += 1
+                yield data
+            if not page.found_results:
+                raise APIException('Unable to find results', response)
+        finally:
+            response.close()
+
+        offset += returned
+        if not _has_next_page(returned, page.has_next, page.count, offset,
+                              params['limit']):
+            return
+
+
+def _set_page_limit(client, page_size, offset, params):
+    """Set the page size in the params, returning the starting offset."""
+    if page_size is None:
+        page_size = client.max_pagination
+    params['limit'] = utils.clamp(page_size, minimum=1,
+                                  maximum=client.max_pagination)
+    return utils.clamp(offset)
+
 
+def _iter_pages(cls, page_size, offset, prefetch, client, params):
+    """Yield the raw data of each page of the collection in turn."""
+    client = client or get_default_client()
+    if prefetch is None:
+        prefetch = client.get_setting("PREFETCH_PAGES")
+    offset = _set_page_limit(client, page_size, offset, params)
+    url = cls.get_collection_url(client)
 
-def create(cls, **data):
+    def fetch_page(offset):
+        page_params = dict(params, offset=offset)
+        response = request("get", params=page_params, client=client, url=url)
+        return client.response_parser.parse_page(response)
+
+    while True:
+        page = fetch_page(offset)
+        offset += len(page.results)
+        has_next = _has_next_page(len(page.results), page.has_next,
+                                  page.count, offset, params['limit'])
+        if has_next and prefetch and page.count is not None:
+            # The server may cap the page size below the requested limit,
+            # so step by what it actually returned.
+            offsets = range(offset, page.count, len(page.results))
+            prefetched = _prefetch_pages(fetch_page, offsets, prefetch,
+                                         client.pool)
+            yield page.results
+            for results in prefetched:
+                yield results
+            return
+
+        yield page.results
+        if not has_next:
+            return
+
+
+def _prefetch_pages(fetch_page, offsets, prefetch, pool):
+    """Start fetching the pages at `offsets` concurrently.
+
+    The first `prefetch` pages are requested straight away. At most that
+    many pages are requested or buffered at any one time.
+
+    Returns:
+        A generator of the results of each page, in order.
+    """
+    offsets = iter(offsets)
+    pending = deque(pool.apply_async(fetch_page, (offset,))
+                    for offset in islice(offsets, prefetch))
+    return _collect_pages(fetch_page, offsets, pending, pool)
+
+
+def _collect_pages(fetch_page, offsets, pending, pool):
+    while pending:
+        page = pending.popleft().get()
+        for offset in islice(offsets, 1):
+            pending.append(pool.apply_async(fetch_page, (offset,)))
+        yield page.results
+
+
+def _has_next_page(returned, has_next, count, offset, limit):
+    if not returned:
+        return False
+    elif has_next is not None:
+        return has_next
+    elif count is not None:
+        return offset < count
+    return returned >= limit
+
+
+def to_columns(cls, field_names=None, as_numpy=False, page_size=None,
+               prefetch=None, client=None, **params):
+    """Retrieve a collection as one column of values per field.
+
+    Pages are streamed straight into the columns without creating any
+    resources, which makes loading a large collection for numeric analysis
+    much faster::
+
+        columns = to_columns(Foo, ["score", "created"], status="done")
+        average = sum(columns["score"]) / len(columns["score"])
+
+    Numeric fields are collected into typed arrays (see
+    `drf_client.columns`), `DateTimeField` values are parsed into datetimes,
+    related resources are represented by their ids and anything else is
+    kept in a list.
+
+    Arguments:
+        cls (Resource class): The resource type to retrieve
+        field_names (list): The names of the fields to export. Defaults to
+            every field declared on the resource. The id is always included.
+        as_numpy (bool): Return NumPy arrays instead, NumPy must be
+            installed.
+        page_size (int): The number of resources to request per page.
+        prefetch (int): The number of pages to request ahead, see `iterate`.
+        client (Client): The client to retrieve the resources with.
+        params (kwargs): Any additional filters and expected values.
+
+    Raises:
+        ValueError: If a name isn't a field declared on the resource.
+
+    Returns:
+        An OrderedDict of field name to column, in the order asked for.
+    """
+    if field_names is None:
+        field_names = list(cls._declared_fields)
+    unknown = [name for name in field_names
+               if name not in cls._declared_fields and name != "id"]
+    if unknown:
+        msg = "Unknown fields for {0}: {1}"
+        raise ValueError(msg.format(cls.__name__, ", ".join(unknown)))
+
+    getters = OrderedDict([("id", itemgetter("id"))])
+    buffers = OrderedDict([("id", columns.Column())])
+    for name in field_names:
+        if name != "id":
+            field = cls._declared_fields[name]
+            # As Resource._set_field_names does, in case no instance of the
+            # resource was created yet.
+            field.field_name = name
+            getters[name] = columns.get_value_getter(field)
+            buffers[name] = columns.make_column(field)
+
+    pages = _iter_pages(cls, page_size, 0, prefetch, client, params)
+    for page in pages:
+        for name, column in buffers.iteritems():
+            column.extend(map(getters[name], page))
+
+    if as_numpy:
+        return OrderedDict((name, columns.to_numpy(column))
+                           for name, column in buffers.iteritems())
+    return OrderedDict((name, column.values)
+                       for name, column in buffers.iteritems())
+
+
+def in_bulk(cls, ids, chunk_size=None, filter_name=None, client=None):
+    """Retrieve many resources by id with as few requests as possible.
+
+    Rather than one GET per resource, the ids are sent in chunks as a
+    list filter on the collection, e.g. `?id__in=1,2,3`::
+
+        foos = in_bulk(Foo, [1, 2, 3])
+        foos[2].name
+
+    Arguments:
+        cls (Resource class): The resource type to retrieve
+        ids (iterable): The primary keys of the resources.
+        chunk_size (int): The maximum number of ids per request. Defaults
+            to the BULK_CHUNK_SIZE setting, capped at MAX_PAGINATION.
+        filter_name (str): The collection filter that accepts a comma
+            separated list of ids. Defaults to the BULK_LOOKUP_FILTER
+            setting.
+        client (Client): The client to retrieve the resources with.
+
+    Returns:
+        A dict of the resources found, keyed by id. Ids the API didn't
+        return are left out.
+    """
+    return dict((data['id'], cls(data=data, client=client))
+                for data in _bulk_data(cls, ids, chunk_size, filter_name,
+                                       client))
+
+
+def _bulk_data(cls, ids, chunk_size=None, filter_name=None, client=None):
+    """Yield the raw data of the resources with the given ids."""
+    client = client or get_default_client()
+    if chunk_size is None:
+        chunk_size = client.get_setting("BULK_CHUNK_SIZE")
+    if filter_name is None:
+        filter_name = client.get_setting("BULK_LOOKUP_FILTER")
+    chunk_size = utils.clamp(chunk_size, minimum=1,
+                             maximum=client.max_pagination)
+    url = cls.get_collection_url(client)
+
+    unique_ids = utils.unique(pk for pk in ids if pk is not None)
+    for chunk in utils.chunked(unique_ids, chunk_size):
+        params = {filter_name: ",".join(str(pk) for pk in chunk),
+                  'limit': len(chunk), 'offset': 0}
+        response = request("get", params=params, client=client, url=url)
+        for data in client.response_parser.parse_page(response).results:
+            yield data
+
+
+def create(cls, client=None, **data):
     """Create a single instance of a Resource.
 
     Arguments:
         cls (Resource class): The resource to create.
+        client (Client): The client to create the resource with.
 
     All other keyword arguments will be provided to the request
     when POSTing. For example::
@@ -80,10 +409,248 @@ def create(cls, **data):
     ...would try to create an instance of the Foo resource
     with a name set to "bar" and an email set to "baz@foo.com".
     """
-    instance = cls()
+    instance = cls(client=client)
     instance.run_validation(data)
-    response = request("post", url=cls.get_collection_url(), data=data)
+    return _post(cls, data, client)
+
+
+def _post(cls, data, client):
+    response = request("post", url=cls.get_collection_url(client),
+                       data=data, client=client)
     try:
-        return utils.parse_resources(cls=cls, response=response, many=False)
+        return utils.parse_resources(cls=cls, response=response, many=False,
+                                     client=client)
     except IndexError:
         return None
+
+
+def bulk_create(cls, records, batch_size=None, bulk=True, client=None):
+    """Create many instances of a Resource.
+
+    Every record is validated before anything is sent. The records are
+    then POSTed as JSON arrays of at most `batch_size` records, for
+    endpoints which accept a list body (e.g. views using a serializer
+    with `many=True`)::
+
+        bulk_create(Foo, [{"name": "bar"}, {"name": "baz"}])
+
+    For endpoints which only accept one record at a time, pass
+    `bulk=False` to POST the records one by one, concurrently on the
+    client's worker pool. Failures don't stop the other records; they're
+    raised together once every record has been attempted, along with the
+    resources which were created.
+
+    Arguments:
+        cls (Resource class): The resource to create.
+        records (iterable): A dict of data for each resource to create.
+        batch_size (int): The maximum number of records per request.
+            Defaults to the BULK_CHUNK_SIZE setting.
+        bulk (bool): Whether the endpoint accepts a list of records.
+        client (Client): The client to create the resources with.
+
+    Returns:
+        A list of the created resources, in the order of the records.
+
+    Raises:
+        BulkOperationError: If any record failed to be created one by one.
+            Its `results` hold the resources which were created.
+    """
+    client = client or get_default_client()
+    records = list(records)
+    instance = cls(client=client)
+    for record in records:
+        instance.run_validation(record)
+
+    if not bulk:
+        resources, errors = _gather(
+            client, lambda record: _post(cls, record, client), records)
+        _raise_for_errors("Could not create every resource", errors,
+                          results=resources)
+        return resources
+
+    if batch_size is None:
+        batch_size = client.get_setting("BULK_CHUNK_SIZE")
+    resources = []
+    for batch in utils.chunked(records, utils.clamp(batch_size, minimum=1)):
+        response = request("post", url=cls.get_collection_url(client),
+                           data=batch, client=client)
+        resources.extend(utils.parse_resources(cls, response, client=client))
+    return resources
+
+
+def delete_many(cls, resources, bulk=False, chunk_size=None,
+                filter_name=None, client=None):
+    """Delete many resources.
+
+    Each resource is deleted with its own DELETE, concurrently on the
+    client's worker pool. Failures don't stop the other deletions; they're
+    gathered and raised together once every deletion has been attempted.
+
+    For collections which support deleting by filter, pass `bulk=True` to
+    send a DELETE to the collection per chunk of ids instead, filtered
+    with e.g. `?id__in=1,2,3`.
+
+    Arguments:
+        cls (Resource class): The resource type to delete.
+        resources (iterable): Resource instances or ids to delete.
+        bulk (bool): Whether the collection supports filtered deletes.
+        chunk_size (int): The maximum number of ids per filtered delete.
+            Defaults to the BULK_CHUNK_SIZE setting.
+        filter_name (str): The collection filter that accepts a comma
+            separated list of ids. Defaults to the BULK_LOOKUP_FILTER
+            setting.
+        client (Client): The client to delete the resources with.
+
+    Raises:
+        BulkOperationError: If any of the deletions failed.
+    """
+    client = client or get_default_client()
+    resources = [_as_resource(cls, resource, client)
+                 for resource in resources]
+
+    if not bulk:
+        _, errors = _gather(client, lambda resource: resource.delete(),
+                            resources)
+        _raise_for_errors("Could not delete every resource", errors)
+        return
+
+    if chunk_size is None:
+        chunk_size = client.get_setting("BULK_CHUNK_SIZE")
+    if filter_name is None:
+        filter_name = client.get_setting("BULK_LOOKUP_FILTER")
+
+    def delete_chunk(chunk):
+        params = {filter_name: ",".join(str(resource.id) for resource in chunk)}
+        response = request("delete", url=cls.get_collection_url(client),
+                           params=params, client=client)
+        if not response.ok:
+            raise APIException("Could not delete %s" % chunk, response=response)
+        for resource in chunk:
+            client.cache.discard(cls, resource.id)
+
+    chunks = list(utils.chunked(resources, utils.clamp(chunk_size, minimum=1)))
+    _, errors = _gather(client, delete_chunk, chunks)
+    _raise_for_errors("Could not delete every chunk of resources", errors)
+
+
+def update_many(cls, changes, bulk=False, chunk_size=None, client=None):
+    """Update many resources.
+
+    Each resource is updated with its own PATCH (see `Resource.save`),
+    concurrently on the client's worker pool. Failures don't stop the
+    other updates; they're gathered and raised together once every update
+    has been attempted::
+
+        update_many(Foo, {1: {"name": "bar"}, 2: {"name": "baz"}})
+
+    For collections which accept a list of partial updates, pass
+    `bulk=True` to PATCH the collection with chunks of the updates, each
+    including the id of its resource, instead.
+
+    Arguments:
+        cls (Resource class): The resource type to update.
+        changes (dict or iterable): The new field values for each resource,
+            keyed by field name, as a dict or (resource, values) pairs.
+            Resources may be given as instances or ids.
+        bulk (bool): Whether the collection accepts lists of updates.
+        chunk_size (int): The maximum number of updates per bulk request.
+            Defaults to the BULK_CHUNK_SIZE setting.
+        client (Client): The client to update the resources with.
+
+    Returns:
+        A list of the updated resources.
+
+    Raises:
+        BulkOperationError: If any of the updates failed.
+    """
+    client = client or get_default_client()
+    if isinstance(changes, dict):
+        changes = changes.items()
+    changes = [(_as_resource(cls, resource, client), values)
+               for resource, values in changes]
+    for _, values in changes:
+        unknown = set(values) - set(cls._declared_fields)
+        if unknown:
+            msg = "Unknown fields for {0}: {1}"
+            raise ValueError(msg.format(cls.__name__, ", ".join(unknown)))
+
+    if not bulk:
+        def update(change):
+            resource, values = change
+            for fieldname, value in values.iteritems():
+                setattr(resource, fieldname, value)
+            resource.save()
+            return resource
+
+        resources, errors = _gather(client, update, changes)
+        _raise_for_errors("Could not update every resource", errors,
+                          results=resources)
+        return resources
+
+    if chunk_size is None:
+        chunk_size = client.get_setting("BULK_CHUNK_SIZE")
+
+    def update_chunk(chunk):
+        data = []
+        for resource, values in chunk:
+            values = dict((cls._declared_fields[fieldname].source, value)
+                          for fieldname, value in values.iteritems())
+            values["id"] = resource.id
+            resource.format_data(values)
+            data.append(values)
+        response = request("patch", url=cls.get_collection_url(client),
+                           data=data, client=client)
+        return utils.parse_resources(cls, response, client=client)
+
+    chunks = list(utils.chunked(changes, utils.clamp(chunk_size, minimum=1)))
+    results, errors = _gather(client, update_chunk, chunks)
+    _raise_for_errors("Could not update every chunk of resources", errors)
+    return [resource for chunk in results for resource in chunk]
+
+
+def _as_resource(cls, resource, client):
+    if isinstance(resource, cls):
+        return resource
+    return cls(id=resource, client=client)
+
+
+def _gather(client, func, items):
+    """Call `func` for each item on the worker pool, collecting failures.
+
+    Returns:
+        A tuple of the results (None for any item that failed), and a list
+        of (item, exception) pairs for the items that failed.
+    """
+    def attempt(item):
+        try:
+            return func(item), None
+        except Exception as error:
+            return None, error
+
+    outcomes = client.pool.map(attempt, items)
+    errors = [(item, error) for item, (_, error) in zip(items, outcomes)
+              if error is not None]
+    return [result for result, _ in outcomes], errors
+
+
+def _raise_for_errors(message, errors, results=None):
+    if errors:
+        raise BulkOperationError(message, errors, results=results)
+
+
+def create_async(cls, callback=None, client=None, **data):
+    """Create a single instance of a Resource without blocking the caller.
+
+    See `create` and `get_async`.
+
+    Returns:
+        An `AsyncResult`; call `.get()` on it to wait for the new resource.
+    """
+    data['client'] = client
+    return _apply_async(client, create, (cls,), data, callback)
+
+
+def _apply_async(client, func, args, kwargs, callback=None):
+    """Run `func` on the worker pool of the client."""
+    pool = (client or get_default_client()).pool
+    return pool.apply_async(func, args, kwargs, callback)
@@ -0,0 +1,117 @@
+"""
+drf_client SDK: Batching
+
+Coalesces the lazy loading of resources into bulk requests. Within a
+batching scope, resources created with just an id are collected instead
+of each being fetched on its own. The first time one of them needs its
+data, every collected resource of the same class is loaded with a single
+chunked `id__in` request (see `Resource.fetch_many`)::
+
+    with batch_loads():
+        projects = [Project(id=pk) for pk in ids]
+        names = [project.name for project in projects]  # One request.
+"""
+
+import threading
+from collections import OrderedDict
+
+_local = threading.local()
+
+
+def _get_stack():
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def get_current_batch():
+    """Return the innermost active batch of this thread, if any."""
+    stack = _get_stack()
+    return stack[-1] if stack else None
+
+
+def register(resource):
+    """Collect an unloaded resource in the active batch, if there is one."""
+    batch = get_current_batch()
+    if batch is not None:
+        batch.add(resource)
+
+
+def load(resource):
+    """Load the resource through the batch that collected it.
+
+    Returns:
+        True if a batch loaded the resource, False if it wasn't collected
+        by any active batch.
+    """
+    for batch in reversed(_get_stack()):
+        if batch.load(resource):
+            return True
+    return False
+
+
+class LoadBatch(object):
+    """A batching scope, used as a context manager. See `batch_loads`.
+
+    Keyword Arguments:
+        chunk_size (int): The maximum number of ids per request.
+        filter_name (str): The collection filter that accepts a list of ids.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self._pending = OrderedDict()
+
+    def __enter__(self):
+        _get_stack().append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _get_stack().remove(self)
+        self._pending.clear()
+
+    def __len__(self):
+        return sum(len(pending) for pending in self._pending.values())
+
+    def add(self, resource):
+        """Collect a resource to be loaded along with others of its class."""
+        pending = self._pending.setdefault(type(resource), OrderedDict())
+        pending[id(resource)] = resource
+
+    def load(self, resource):
+        """Load the resource along with every collected one of its class.
+
+        Returns:
+            True if the resource had been collected by this batch.
+        """
+        pending = self._pending.get(type(resource))
+        if not pending or id(resource) not in pending:
+            return False
+
+        del self._pending[type(resource)]
+        self._load(type(resource), pending)
+        return True
+
+    def flush(self):
+        """Load every collected resource now."""
+        while self._pending:
+            cls, pending = self._pending.popitem(last=False)
+            self._load(cls, pending)
+
+    def _load(self, cls, pending):
+        cls.fetch_many(pending.values(), **self.options)
+
+
+def batch_loads(**options):
+    """Open a scope which coalesces lazy resource loads.
+
+    Keyword Arguments:
+        chunk_size (int): The maximum number of ids per request.
+        filter_name (str): The collection filter that accepts a list of ids.
+
+    Returns:
+        A `LoadBatch` to use in a with statement.
+    """
+    return LoadBatch(**options)
@@ -0,0 +1,118 @@
+"""
+drf_client SDK: Cache
+
+An identity map of the data loaded for each resource, keyed by the
+resource's class and id. Every resource instance pointing at the same
+record shares the data (and the time it was loaded) through it, so ten
+`Project(id=5)` instances cost one request rather than ten.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+from drf_client.records import Record
+
+
+def sizeof(obj):
+    """Approximate the memory used by a decoded JSON structure, in bytes."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sizeof(key) + sizeof(value)
+                    for key, value in obj.iteritems())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(sizeof(element) for element in obj)
+    elif isinstance(obj, Record):
+        # The keys are shared with other records through the schema.
+        size += sizeof(obj._values)
+    return size
+
+
+class CacheEntry(object):
+    """The data loaded for a resource, when it was loaded and the validators
+    (ETag / Last-Modified) the API sent with it."""
+
+    __slots__ = ("data", "loaded", "validators", "size")
+
+    def __init__(self, data, loaded, validators=None, size=0):
+        self.data = data
+        self.loaded = loaded
+        self.validators = validators
+        self.size = size
+
+
+class ResourceCache(object):
+    """A thread safe LRU cache of resource data.
+
+    Keyword Arguments:
+        max_entries (int): The maximum number of resources to hold on to.
+            0 disables the cache.
+        max_bytes (int): The approximate maximum memory the cached data may
+            use. None for no limit. Measuring the data isn't free, so only
+            set this when the size of records varies widely.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, cls, pk):
+        """Return the `CacheEntry` for the resource, or None if not cached."""
+        key = (cls, pk)
+        with self._lock:
+            try:
+                entry = self._entries.pop(key)
+            except KeyError:
+                return None
+            # Re-insert to mark it as the most recently used.
+            self._entries[key] = entry
+            return entry
+
+    def peek(self, cls, pk):
+        """Return the `CacheEntry` for the resource without marking it as
+        recently used. Cheaper than `get`, for checks on every read."""
+        return self._entries.get((cls, pk))
+
+    def set(self, cls, pk, data, loaded, validators=None):
+        """Store the data loaded for the resource, evicting old entries."""
+        if self.max_entries == 0:
+            return
+
+        size = sizeof(data) if self.max_bytes is not None else 0
+        key = (cls, pk)
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = CacheEntry(data, loaded, validators, size)
+            self.size += size
+            self._evict()
+
+    def discard(self, cls, pk):
+        """Forget the resource, if it's cached."""
+        with self._lock:
+            self._pop((cls, pk))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def _evict(self):
+        while self._entries and self._is_full():
+            _, entry = self._entries.popitem(last=False)
+            self.size -= entry.size
+
+    def _is_full(self):
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.size > self.max_bytes
@@ -0,0 +1,303 @@
+"""
+drf_client SDK: Client
+
+A Client bundles everything needed to talk to one API: its configuration,
+authentication, pooled transport, worker pool and resource cache. Several
+clients can live side by side in one process (e.g. one per worker thread,
+or one per API host) without interfering with each other.
+
+The module level functions (`api.get`, `api.create`, `auth.set_token`, ...)
+keep working through a default client that reads its configuration from
+`drf_client.settings`.
+"""
+
+import pydoc
+import threading
+from multiprocessing.pool import ThreadPool
+
+from drf_client import auth, settings
+from drf_client.cache import ResourceCache
+from drf_client.codec import get_codec
+from drf_client.retry import RetryPolicy
+from drf_client.singleflight import SingleFlight
+from drf_client.stats import Counters
+from drf_client.throttle import Governor
+from drf_client.transport import Transport
+
+
+class Client(object):
+    """A connection to a single API.
+
+    Any setting from `drf_client.settings` may be overridden for this client
+    by passing it as a keyword argument (case insensitive). Settings which
+    aren't overridden fall back to the module level value::
+
+        client = Client(host="api.example.com", use_https=True)
+        client.set_token("abcdef")
+        projects = client.get(Project, name="foo")
+
+    Keyword Arguments:
+        authentication (AuthenticationBase): The authentication to use for
+            this client. Defaults to `settings.AUTHENTICATION`.
+        transport (Transport): The pooled transport to send requests with.
+            By default one is created from the pool settings.
+    """
+
+    def __init__(self, authentication=None, transport=None, **config):
+        self.config = dict((key.upper(), value)
+                           for key, value in config.items())
+        self._authentication = authentication
+        self._transport = transport
+        self._transport_lock = threading.Lock()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._cache = None
+        self._cache_lock = threading.Lock()
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self.stats = Counters()
+        self.single_flight = SingleFlight(stats=self.stats)
+
+    def get_setting(self, name):
+        """Return the value of the setting for this client."""
+        try:
+            return self.config[name]
+        except KeyError:
+            return getattr(settings, name)
+
+    @property
+    def api_url(self):
+        if "API_URL" in self.config:
+            return self.config["API_URL"]
+        elif "HOST" in self.config or "USE_HTTPS" in self.config:
+            scheme = "https" if self.get_setting("USE_HTTPS") else "http"
+            return "{0}://{1}".format(scheme, self.get_setting("HOST"))
+        return settings.API_URL
+
+    @property
+    def verify_ssl(self):
+        return self.get_setting("VERIFY_SSL")
+
+    @property
+    def max_pagination(self):
+        return self.get_setting("MAX_PAGINATION")
+
+    @property
+    def codec(self):
+        """The `JSONCodec` request and response bodies are handled with."""
+        return get_codec(self.get_setting("JSON_CODEC"))
+
+    @property
+    def response_parser(self):
+        # from http://stackoverflow.com/questions/547829
+        Parser = pydoc.locate(self.get_setting("RESPONSE_PARSER"))
+        return Parser(codec=self.codec)
+
+    @property
+    def authentication(self):
+        if self._authentication is None:
+            return settings.AUTHENTICATION
+        return self._authentication
+
+    @authentication.setter
+    def authentication(self, authentication):
+        self._authentication = authentication
+
+    def set_token(self, token):
+        self.authentication = auth.TokenAuthentication(token=token)
+
+    def log_in(self, username, password):
+        self.authentication = auth.BasicAuthentication(username, password)
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            with self._transport_lock:
+                if self._transport is None:
+                    self._transport = self._create_transport()
+        return self._transport
+
+    def _create_transport(self):
+        return Transport(
+            pool_connections=self.get_setting("POOL_CONNECTIONS"),
+            pool_maxsize=self.get_setting("POOL_MAXSIZE"),
+            pool_block=self.get_setting("POOL_BLOCK"),
+            keep_alive=self.get_setting("KEEP_ALIVE"),
+            retry=self.retry_policy,
+            governor=Governor(
+                rate=self.get_setting("RATE_LIMIT"),
+                burst=self.get_setting("RATE_BURST"),
+                max_in_flight=self.get_setting("MAX_IN_FLIGHT"),
+                hosts=self.get_setting("HOST_LIMITS")),
+            stats=self.stats)
+
+    @property
+    def retry_policy(self):
+        """The `RetryPolicy` built from the RETRY_* settings of this client."""
+        return RetryPolicy(
+            max_attempts=self.get_setting("RETRY_MAX_ATTEMPTS"),
+            statuses=self.get_setting("RETRY_STATUSES"),
+            backoff=self.get_setting("RETRY_BACKOFF"),
+            max_backoff=self.get_setting("RETRY_MAX_BACKOFF"),
+            jitter=self.get_setting("RETRY_JITTER"),
+            retry_post=self.get_setting("RETRY_POST"))
+
+    @property
+    def pool(self):
+        """The worker pool used to issue requests concurrently.
+
+        Its size comes from the MAX_WORKERS setting; keep POOL_MAXSIZE at
+        least as large so every worker can hold on to a connection.
+        """
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPool(self.get_setting("MAX_WORKERS"))
+        return self._pool
+
+    def run_once(self, key, func, *args):
+        """Run `func` on the worker pool unless it's already running.
+
+        Calls sharing the same `key` are de-duplicated: while one is in
+        progress, further calls are dropped.
+
+        Returns:
+            The `AsyncResult` of the call, or None if one with the same key
+            was already running.
+        """
+        with self._running_lock:
+            if key in self._running:
+                return None
+            self._running.add(key)
+
+        def run():
+            try:
+                return func(*args)
+            finally:
+                with self._running_lock:
+                    self._running.discard(key)
+
+        try:
+            return self.pool.apply_async(run)
+        except Exception:
+            with self._running_lock:
+                self._running.discard(key)
+            raise
+
+    @property
+    def cache(self):
+        """The data loaded for each resource, shared by every instance."""
+        if self._cache is None:
+            with self._cache_lock:
+                if self._cache is None:
+                    self._cache = ResourceCache(
+                        max_entries=self.get_setting("CACHE_MAX_ENTRIES"),
+                        max_bytes=self.get_setting("CACHE_MAX_BYTES"))
+        return self._cache
+
+    def close(self):
+        """Release the pooled connections and workers held by this client."""
+        if self._transport is not None:
+            self._transport.close()
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def request(self, method, url, **kwargs):
+        """Issue a request through this client. See `api.request`."""
+        from drf_client import api
+        return api.request(method, url, client=self, **kwargs)
+
+    def get(self, cls, **kwargs):
+        """Retrieve a set of resources through this client. See `api.get`."""
+        from drf_client import api
+        return api.get(cls, client=self, **kwargs)
+
+    def get_async(self, cls, **kwargs):
+        """Retrieve a set of resources on the worker pool.
+
+        See `api.get_async`.
+        """
+        from drf_client import api
+        return api.get_async(cls, client=self, **kwargs)
+
+    def iterate(self, cls, **kwargs):
+        """Lazily retrieve every resource through this client.
+
+        See `api.iterate`.
+        """
+        from drf_client import api
+        return api.iterate(cls, client=self, **kwargs)
+
+    def to_columns(self, cls, field_names=None, **kwargs):
+        """Retrieve a collection as columns through this client.
+
+        See `api.to_columns`.
+        """
+        from drf_client import api
+        return api.to_columns(cls, field_names, client=self, **kwargs)
+
+    def in_bulk(self, cls, ids, **kwargs):
+        """Retrieve many resources by id through this client.
+
+        See `api.in_bulk`.
+        """
+        from drf_client import api
+        return api.in_bulk(cls, ids, client=self, **kwargs)
+
+    def create(self, cls, **data):
+        """Create a resource through this client. See `api.create`."""
+        from drf_client import api
+        return api.create(cls, client=self, **data)
+
+    def bulk_create(self, cls, records, **kwargs):
+        """Create many resources through this client.
+
+        See `api.bulk_create`.
+        """
+        from drf_client import api
+        return api.bulk_create(cls, records, client=self, **kwargs)
+
+    def delete_many(self, cls, resources, **kwargs):
+        """Delete many resources through this client.
+
+        See `api.delete_many`.
+        """
+        from drf_client import api
+        return api.delete_many(cls, resources, client=self, **kwargs)
+
+    def update_many(self, cls, changes, **kwargs):
+        """Update many resources through this client.
+
+        See `api.update_many`.
+        """
+        from drf_client import api
+        return api.update_many(cls, changes, client=self, **kwargs)
+
+    def create_async(self, cls, **data):
+        """Create a resource on the worker pool. See `api.create_async`."""
+        from drf_client import api
+        return api.create_async(cls, client=self, **data)
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """Return the client used when no client is given explicitly."""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = Client()
+    return _default_client
+
+
+def reset_default_client():
+    """Discard the default client so the next request picks up new settings."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = None
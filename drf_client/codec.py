@@ -0,0 +1,117 @@
+"""
+drf_client SDK: Codec
+
+Encodes request bodies and decodes response bodies. Decoding large list
+pages is the biggest CPU cost of the client, so the fastest JSON library
+installed is used by default, falling back to the standard library::
+
+    client = Client(json_codec="simplejson")  # Pick a backend by name.
+    client = Client(json_codec=JSONCodec(dumps=my_dumps, loads=my_loads))
+
+The JSON_CODEC setting accepts "auto", the name of a backend from
+`BACKENDS`, or a `JSONCodec` instance. Whichever backend is used, floats
+come through a round trip unchanged.
+"""
+
+import importlib
+from functools import partial
+
+# In order of preference for "auto".
+BACKENDS = ("ujson", "simplejson", "json")
+
+
+class JSONCodec(object):
+    """A pair of functions to encode and decode JSON with.
+
+    Arguments:
+        dumps (callable): Turns a Python structure into a JSON string.
+        loads (callable): Turns a JSON string (or bytes) into Python.
+        name (str): Describes the codec, for debugging.
+    """
+
+    def __init__(self, dumps, loads, name="custom"):
+        self.dumps = dumps
+        self.loads = loads
+        self.name = name
+
+    def __repr__(self):
+        return "{0}({1})".format(self.__class__.__name__, self.name)
+
+    def encode(self, data):
+        return self.dumps(data)
+
+    def decode(self, content):
+        return self.loads(content)
+
+
+def load_backend(name):
+    """Return a `JSONCodec` for the named JSON library.
+
+    Raises:
+        ImportError: If the library isn't installed.
+        ValueError: If the name isn't one of `BACKENDS`.
+    """
+    if name not in BACKENDS:
+        msg = "Unknown JSON backend '{0}', expected one of: {1}"
+        raise ValueError(msg.format(name, ", ".join(BACKENDS)))
+    module = importlib.import_module(name)
+    if name == "ujson":
+        return _ujson_codec(module)
+    return JSONCodec(module.dumps, module.loads, name=name)
+
+
+def _ujson_codec(ujson):
+    """ujson (1.x, on Python 2) rounds floats to 9 digits when encoding and
+    parses them approximately by default. Floats are decoded precisely
+    instead, and encoded with the next backend, as encoding is rarely the
+    bottleneck."""
+    try:
+        ujson.loads("0.1", precise_float=True)
+    except TypeError:
+        # Releases without the option always parse floats precisely.
+        loads = ujson.loads
+    else:
+        loads = partial(ujson.loads, precise_float=True)
+
+    dumps = load_backend(available_backends(exclude=("ujson",))[0]).dumps
+    return JSONCodec(dumps, loads, name="ujson")
+
+
+def available_backends(exclude=()):
+    """Return the names of the installed JSON backends, fastest first."""
+    names = []
+    for name in BACKENDS:
+        if name in exclude:
+            continue
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+_codecs = {}
+
+
+def get_codec(codec="auto"):
+    """Return the codec for a JSON_CODEC setting value.
+
+    Arguments:
+        codec (str or JSONCodec): "auto" for the fastest installed backend,
+            the name of a backend, or a codec to use as it is.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+
+    try:
+        return _codecs[codec]
+    except KeyError:
+        pass
+
+    if codec == "auto":
+        found = load_backend(available_backends()[0])
+    else:
+        found = load_backend(codec)
+    _codecs[codec] = found
+    return found
@@ -0,0 +1,147 @@
+"""
+drf_client SDK: Columns
+
+Buffers for exporting a collection field by field rather than resource by
+resource (see `api.to_columns`). Numeric fields are collected in typed
+arrays, which hold their values unboxed and can be handed to NumPy without
+copying them one by one.
+"""
+
+from array import array
+from collections import Mapping
+
+from drf_client.fields import DateTimeField
+from drf_client.utils import convert_from_utf8
+
+NAN = float("nan")
+
+
+def _is_int(value):
+    # bool is a subclass of int, but doesn't belong in a numeric column.
+    return type(value) in (int, long)
+
+
+def _is_number(value):
+    return value is None or type(value) in (int, long, float)
+
+
+class Column(object):
+    """A column of values which picks the most compact storage it can.
+
+    The column starts as an array of integers or of floats, depending on
+    its first value, and is widened as other values come in: integers to
+    floats (missing values become NaN in a float column), and anything
+    else to a plain list.
+    """
+
+    def __init__(self):
+        self.values = []
+        self._started = False
+
+    def __len__(self):
+        return len(self.values)
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def append(self, value):
+        if not self._started:
+            self.values = self._start(value)
+            self._started = True
+
+        typecode = getattr(self.values, "typecode", None)
+        if typecode == "l":
+            if _is_int(value):
+                try:
+                    self.values.append(value)
+                    return
+                except OverflowError:
+                    self._to_list()
+            elif _is_number(value):
+                self.values = array("d", self.values)
+            else:
+                self._to_list()
+        elif typecode == "d" and not _is_number(value):
+            self._to_list()
+
+        if getattr(self.values, "typecode", None) == "d":
+            self.values.append(NAN if value is None else value)
+        else:
+            self.values.append(convert_from_utf8(value))
+
+    def _start(self, value):
+        if _is_int(value):
+            return array("l")
+        elif _is_number(value):
+            return array("d")
+        return []
+
+    def _to_list(self):
+        # Missing values were stored as NaN, JSON has no NaN of its own.
+        self.values = [None if value != value else value
+                       for value in self.values]
+
+
+class DateTimeColumn(object):
+    """A column of datetimes, parsed a page at a time."""
+
+    def __init__(self):
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def extend(self, values):
+        self.values.extend(DateTimeField.to_datetimes(values))
+
+
+def make_column(field):
+    """Return an empty column for the values of the field."""
+    if isinstance(field, DateTimeField):
+        return DateTimeColumn()
+    return Column()
+
+
+def get_value_getter(field):
+    """Return a function which reads the field's value from a row of data.
+
+    Related resources are represented by their ids.
+    """
+    from drf_client.resources import ListResource, Resource
+
+    source = field.source
+    if isinstance(field, Resource):
+        return lambda row: _get_id(row.get(source))
+    elif isinstance(field, ListResource):
+        return lambda row: [_get_id(item) for item in row.get(source) or ()]
+    return lambda row: row.get(source)
+
+
+def _get_id(data):
+    # Relations may be rendered as nested data or as primary keys.
+    return data.get("id") if isinstance(data, Mapping) else data
+
+
+def to_numpy(column):
+    """Convert the values of a column into a NumPy array.
+
+    Typed arrays are converted without going through Python objects,
+    datetimes become `datetime64[us]` in UTC and anything else is stored in
+    an object array.
+    """
+    import numpy
+
+    values = column.values
+    if isinstance(values, array):
+        return numpy.frombuffer(values, dtype=values.typecode).copy()
+    elif isinstance(column, DateTimeColumn):
+        return numpy.array([_as_naive_utc(value) for value in values],
+                           dtype="datetime64[us]")
+    return numpy.array(values, dtype=object)
+
+
+def _as_naive_utc(value):
+    if value is None or value.tzinfo is None:
+        return value
+    return (value - value.utcoffset()).replace(tzinfo=None)
@@ -2,6 +2,7 @@ class APIException(RuntimeError):
     """Include additional information from the response on failed requests."""
 
     def __init__(self, message, response):
+        super(APIException, self).__init__(message)
         self.message = message
         self.response = response
 
@@ -11,3 +12,22 @@ class APIException(RuntimeError):
             return "{}. Response: {}".format(self.message, text)
         else:
             return self.message
+
+
+class BulkOperationError(APIException):
+    """Collects every failure of an operation on many resources.
+
+    Attributes:
+        errors (list): A (item, exception) pair for each item that failed.
+        results (list): The result for each item, in order, with None for
+            those which failed (e.g. the resources which were created).
+    """
+
+    def __init__(self, message, errors, results=None):
+        super(BulkOperationError, self).__init__(message, response=None)
+        self.errors = errors
+        self.results = results
+
+    def __str__(self):
+        return "{0}: {1} failed. First error: {2}".format(
+            self.message, len(self.errors), self.errors[0][1])
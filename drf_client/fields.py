@@ -1,5 +1,10 @@
+import re
+from datetime import datetime
+
 from dateutil import parser
+from dateutil.tz import tzoffset, tzutc
 from drf_client import settings
+from drf_client.utils import convert_from_utf8
 
 
 class Field(object):
@@ -17,13 +22,31 @@ class Field(object):
             of the field on the resource.
         required (bool): Indicates whether the field must not be blank.
     """
-    _creation_counter = 0
+    __slots__ = ("required", "_field_name", "_source", "_creation_counter")
+    _counter = 0
 
     def __init__(self, field_name=None, source=None, required=False):
+        # Keeps track of the order fields are declared in on resources.
+        self._creation_counter = Field._counter
+        Field._counter += 1
         self.required = required
         self._field_name = field_name
         self._source = source
 
+    def __getstate__(self):
+        # Classes with __slots__ can't be pickled by default (before
+        # protocol 2), so the slots are gathered along with any __dict__.
+        state = dict(getattr(self, "__dict__", {}))
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get("__slots__", ()):
+                if name != "__weakref__" and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            object.__setattr__(self, name, value)
+
     @property
     def field_name(self):
         if not self._field_name:
@@ -58,15 +81,62 @@ class Field(object):
             # Not called through a parent instance, so return itself
             return self
 
+        # A value set on the parent, but not saved yet, wins.
+        try:
+            return instance._changes[self.field_name]
+        except KeyError:
+            pass
+
         # Get your field value from the attached parent
-        return self.to_representation(instance)
+        return self._get_memoized(instance)
+
+    def __set__(self, instance, value):
+        """Descriptor 'magic_method' for setting this Fields value.
+
+        The value is recorded as a change on the parent instance, and is only
+        sent to the API when the parent is saved (see `Resource.save`).
+        """
+        instance._changes[self.field_name] = value
+        if instance._values:
+            instance._values.pop(self.field_name, None)
+
+    def _get_memoized(self, instance):
+        """Return the representation of this field on the instance.
+
+        It's only computed once for each version of the instance's data, so
+        repeated reads are a dictionary lookup. The data is refreshed first
+        if it's stale, which invalidates what was computed from it.
+        """
+        instance._refresh_if_stale()
+        values = instance._values
+        if values is None:
+            # Created on first use, so resources that are only held in
+            # memory don't pay for it.
+            values = instance._values = {}
+
+        version = instance._data_version
+        try:
+            cached_version, value = values[self.field_name]
+        except KeyError:
+            pass
+        else:
+            if cached_version == version:
+                return value
+
+        # The version is read before computing: if the data is replaced in
+        # the meantime (e.g. by a background revalidation), the value is
+        # recomputed on the next read rather than kept for the new data.
+        value = self.to_representation(instance)
+        values[self.field_name] = (version, value)
+        return value
 
     def to_representation(self, parent):
         """Format and retrieve the representation of this object.
 
         Gets the value from the attached parent and returns it. This is
         provided as a seam for subclassing as additional processing can
-        easily be inserted.
+        easily be inserted. Only the value read is converted to native
+        strings, the parent's data is left as it was decoded.
 
         Args:
             parent (Resource): The parent resource to perform the data
@@ -75,7 +145,7 @@ class Field(object):
         Returns:
             (varies): Representation of this Fields data.
         """
-        return self.get_value_from_parent(parent)
+        return convert_from_utf8(self.get_value_from_parent(parent))
 
     def get_value_from_parent(self, parent, source=None, *args, **kwargs):
         """Retrieve the value from the parent's information.
@@ -101,6 +171,55 @@ class Field(object):
             return None
 
 
+# Timestamps as DRF renders them, e.g. 2015-01-17T01:53:36.123456Z.
+RFC3339_PATTERN = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?"
+    r"(Z|[+-]\d{2}:?\d{2})?$", re.IGNORECASE)
+
+UTC = tzutc()
+_offsets = {}
+
+
+def _get_tz(designator):
+    """Return the tzinfo for an RFC3339 offset ("Z", "+02:00", ...)."""
+    if not designator:
+        return None
+    try:
+        return _offsets[designator]
+    except KeyError:
+        pass
+
+    if designator in ("Z", "z"):
+        tz = UTC
+    else:
+        sign = -1 if designator[0] == "-" else 1
+        digits = designator[1:].replace(":", "")
+        seconds = sign * (int(digits[:2]) * 3600 + int(digits[2:]) * 60)
+        tz = UTC if seconds == 0 else tzoffset(None, seconds)
+    _offsets[designator] = tz
+    return tz
+
+
+def parse_rfc3339(value):
+    """Parse an RFC3339 timestamp, or return None if it isn't one.
+
+    Much faster than `dateutil.parser.parse`, but only understands the
+    strict format the API sends dates in.
+    """
+    match = RFC3339_PATTERN.match(value)
+    if match is None:
+        return None
+
+    year, month, day, hour, minute, second, fraction, tz = match.groups()
+    microsecond = int(fraction[:6].ljust(6, "0")) if fraction else 0
+    try:
+        return datetime(int(year), int(month), int(day), int(hour),
+                        int(minute), int(second), microsecond, _get_tz(tz))
+    except ValueError:
+        # Out of range values, e.g. a leap second. Let dateutil decide.
+        return None
+
+
 class DateTimeField(Field):
 
     def to_representation(self, parent):
@@ -117,6 +236,11 @@ class DateTimeField(Field):
         if not original_date:
             return None
 
+        if isinstance(original_date, basestring):
+            dt = parse_rfc3339(original_date)
+            if dt is not None:
+                return dt
+
         try:
             dt = parser.parse(original_date)
         except AttributeError:
@@ -124,3 +248,31 @@ class DateTimeField(Field):
             raise TypeError(msg.format(dt_format=settings.DATETIME_FORMAT))
 
         return dt
+
+    @classmethod
+    def to_datetimes(cls, original_dates):
+        """Convert a whole column of dates into datetime objects at once.
+
+        Each distinct date is only parsed once, which helps on list pages
+        where many rows share a timestamp::
+
+            created = DateTimeField.to_datetimes(row['created'] for row in rows)
+
+        Arguments:
+            original_dates (iterable): The dates to convert.
+
+        Returns:
+            A list of the datetimes (or None for empty dates), in order.
+        """
+        converted = {}
+        results = []
+        for original_date in original_dates:
+            try:
+                dt = converted[original_date]
+            except KeyError:
+                dt = converted[original_date] = cls.to_datetime(original_date)
+            except TypeError:
+                # Unhashable, let to_datetime complain about it.
+                dt = cls.to_datetime(original_date)
+            results.append(dt)
+        return results
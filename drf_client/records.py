@@ -0,0 +1,166 @@
+"""
+drf_client SDK: Records
+
+A compact, read-only alternative to the dicts JSON is decoded into. Every
+dict holds its own hash table of keys, which adds up when millions of
+resources are kept in memory. A `Record` only holds a tuple of values; the
+keys live in a `Schema` shared by every record with the same keys.
+
+Resources whose class sets `COMPACT = True` store their data as records
+(see `Resource.raw_data`). Records behave like read-only mappings, so the
+resource's fields work the same way.
+"""
+
+import threading
+from collections import Mapping
+
+
+class Schema(object):
+    """The keys of a group of records, and the position of each value."""
+
+    __slots__ = ("keys", "positions")
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.positions = dict((key, position)
+                              for position, key in enumerate(keys))
+
+
+# Dicts used as lookup tables (e.g. keyed by id) would each need a schema
+# of their own, so past this many schemas new key sets are left as dicts.
+MAX_SCHEMAS = 10000
+
+_schemas = {}
+_schemas_lock = threading.Lock()
+
+
+def _intern(key):
+    if isinstance(key, unicode):
+        try:
+            key = key.encode("ascii")
+        except UnicodeEncodeError:
+            return key
+    return intern(key) if type(key) is str else key
+
+
+def get_schema(keys):
+    """Return the shared schema for the keys, creating it on first use.
+
+    Returns:
+        The `Schema`, or None if there are too many schemas already.
+    """
+    keys = tuple(keys)
+    try:
+        return _schemas[keys]
+    except KeyError:
+        pass
+
+    with _schemas_lock:
+        if len(_schemas) >= MAX_SCHEMAS:
+            return _schemas.get(keys)
+        # Intern the keys so every schema refers to the same strings.
+        schema = Schema(tuple(_intern(key) for key in keys))
+        return _schemas.setdefault(keys, schema)
+
+
+class Record(object):
+    """A read-only mapping of its schema's keys to a tuple of values."""
+
+    # Not a Mapping subclass (it's registered as one below), since the
+    # abstract base classes would give every record a __dict__.
+    __slots__ = ("_schema", "_values")
+    __hash__ = None
+
+    def __init__(self, schema, values):
+        self._schema = schema
+        self._values = values
+
+    def __getstate__(self):
+        return self._schema.keys, self._values
+
+    def __setstate__(self, state):
+        keys, values = state
+        # Share the schema of this process's records with the same keys.
+        self._schema = get_schema(keys) or Schema(keys)
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._schema.positions[key]]
+
+    def __contains__(self, key):
+        return key in self._schema.positions
+
+    def __iter__(self):
+        return iter(self._schema.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return dict(self.iteritems()) == dict(other.items())
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return "Record({0!r})".format(self.to_dict())
+
+    def get(self, key, default=None):
+        try:
+            position = self._schema.positions[key]
+        except KeyError:
+            return default
+        return self._values[position]
+
+    def keys(self):
+        return list(self._schema.keys)
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return zip(self._schema.keys, self._values)
+
+    def iterkeys(self):
+        return iter(self._schema.keys)
+
+    def itervalues(self):
+        return iter(self._values)
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def to_dict(self):
+        """Return a regular (mutable) dict with the same contents."""
+        return dict(self.items())
+
+
+Mapping.register(Record)
+
+
+def compact(data):
+    """Convert decoded JSON into records, recursively.
+
+    Dicts become records, lists become lists of compacted values and ASCII
+    text becomes native strings, which take a fraction of the memory (and
+    compare equal on Python 2). Anything else, including records, is
+    returned as it is.
+    """
+    if isinstance(data, dict):
+        keys = sorted(data)
+        schema = get_schema(keys)
+        values = tuple(compact(data[key]) for key in keys)
+        if schema is None:
+            return dict(zip(keys, values))
+        return Record(schema, values)
+    elif isinstance(data, list):
+        return [compact(element) for element in data]
+    elif isinstance(data, unicode):
+        try:
+            return data.encode("ascii")
+        except UnicodeEncodeError:
+            return data
+    return data
@@ -7,17 +7,25 @@ All Resources (e.g., projects, assets, users) subclass from this.
 """
 
 import importlib
+import logging
 import pprint
 
-from collections import OrderedDict
+from collections import OrderedDict, Sequence
 from datetime import datetime, timedelta
-from weakref import WeakKeyDictionary
+from weakref import WeakKeyDictionary, ref
 
-from . import settings, api
+from . import api, batching
+from .client import get_default_client
 from .exceptions import APIException
-from .utils import convert_from_utf8
+from .records import compact
 from .fields import Field
 
+logger = logging.getLogger(__name__)
+
+# Returned by `Resource._fetch_data` when the API says the data we already
+# have is still current.
+NOT_MODIFIED = object()
+
 
 class ResourceMetaclass(type):
     """
@@ -58,8 +66,22 @@ class Resource(Field):
     __metaclass__ = ResourceMetaclass
     _route = ""  # To be overridden by subclasses
     DATA_EXPIRATION = timedelta(minutes=2)
-
-    def __init__(self, id=None, data=None, parent=None, *args, **kwargs):
+    # When set, data older than DATA_EXPIRATION but younger than this is
+    # still returned straight away while it's refreshed in the background.
+    MAX_STALENESS = None
+    # Store the data as compact records instead of dicts (see
+    # drf_client.records), for when many resources are held in memory.
+    COMPACT = False
+
+    # Resources are created in large numbers, so the attributes of each live
+    # in slots. Subclasses which don't declare any slots of their own still
+    # work as usual; their __dict__ is only created if it's used.
+    __slots__ = ("_id", "_client", "_parent", "_validators", "_changes",
+                 "_values", "_data_version", "_data_store", "_last_loaded",
+                 "_list_parent", "__weakref__")
+
+    def __init__(self, id=None, data=None, parent=None, client=None,
+                 *args, **kwargs):
         """Instantiates a Django Rest Framework resource.
 
         The resource performs deferred loading, so no data
@@ -73,12 +95,31 @@ class Resource(Field):
                 Fields.
             parent (instance): The parent Resource/ListResource that created
                 this object. Not always necessary.
+            client (Client): The client the resource talks to the API with.
+                Uses the default client if not provided.
         """
         super(Resource, self).__init__(*args, **kwargs)
         self._id = id
-        self.raw_data = data
+        self._client = client
         self._parent = parent
+        self._validators = None
+        self._changes = {}
+        self._values = None
+        self._data_version = 0
+        self._data_store = None
+        self.raw_data = data
         self._set_field_names()
+        if id is not None and data is None and parent is None:
+            batching.register(self)
+
+    def __getstate__(self):
+        """The state to pickle, leaving out what's specific to this process:
+        the client (the default client is used once unpickled), the memoized
+        field values and the weak reference to a list parent."""
+        state = super(Resource, self).__getstate__()
+        state.update(_client=None, _values=None)
+        state.pop("_list_parent", None)
+        return state
 
     def __new__(cls, *args, **kwargs):
         # Override the new to create `ListResource` classes instead when
@@ -103,6 +144,44 @@ class Resource(Field):
         # is where we would pull the `list_resource_class` needed
         return ListResource(*args, **list_kwargs)
 
+    @classmethod
+    def fetch_many(cls, resources, client=None, **kwargs):
+        """Load many resources at once using chunked list requests.
+
+        Lazily loading each resource costs one request apiece, so reading a
+        field on 500 unloaded resources makes 500 requests. This loads them
+        all with a few `api.in_bulk` style requests instead::
+
+            projects = Project.fetch_many([1, 2, 3])
+
+        Arguments:
+            resources (iterable): Resource instances or ids to load.
+            client (Client): The client used for any ids given. Instances
+                are loaded through the client they're bound to.
+            kwargs: `chunk_size` or `filter_name`, see `api.in_bulk`.
+
+        Returns:
+            A list of the instances (created for any ids given), in order.
+            Any the API didn't return are left unloaded.
+        """
+        instances = [resource if isinstance(resource, Resource)
+                     else cls(id=resource, client=client)
+                     for resource in resources]
+
+        by_client = OrderedDict()
+        for instance in instances:
+            by_client.setdefault(instance._client, []).append(instance)
+
+        for bound_client, group in by_client.items():
+            by_id = OrderedDict()
+            for instance in group:
+                by_id.setdefault(instance.id, []).append(instance)
+            for data in api._bulk_data(cls, by_id, client=bound_client,
+                                       **kwargs):
+                for instance in by_id.get(data['id'], ()):
+                    instance.raw_data = data
+        return instances
+
     def __repr__(self):
         if self.raw_data:
             return '{0}({1})'.format(self.__class__.__name__,
@@ -123,34 +202,36 @@ class Resource(Field):
             return False
         return True
 
-    def __get__(self, instance, owner):
-        """The get for a Resource attached as a descriptor.
+    def to_representation(self, instance):
+        """The value of a Resource attached as a descriptor.
 
         If this is called, it can be assumed to be attached to another Resource.
         In that instance, the resource should utilize it's parent Resource to
-        retrieve it's data. If it has already been loaded with data, return
-        itself.
+        retrieve it's data.
         """
-        if not instance:
-            return self
-
         # Create a new instance of this Resource with the data pulled from
         # it's parent. This must be done to avoid affecting other instances
         # of attached Resources when storing the data directly on self
         parent_data = self.get_value_from_parent(instance, caller=self)
 
         return type(self)(data=parent_data, parent=instance,
-                          field_name=self.field_name)
+                          field_name=self.field_name,
+                          client=instance._client)
 
     def format_data(self, data):
         """Shuffles around fields, if needed, to provide additional data.
 
-        In addition, this will also transform resources into their primary
-        key values.
+        In addition, this will also transform resources (or lists of them)
+        into their primary key values, and datetimes into ISO 8601 strings.
         """
         for key, value in data.iteritems():
             if isinstance(value, Resource):
                 data[key] = value.id
+            elif isinstance(value, (list, tuple, ResourceList)):
+                data[key] = [item.id if isinstance(item, Resource) else item
+                             for item in value]
+            elif isinstance(value, datetime):
+                data[key] = value.isoformat()
 
     def _set_field_names(self):
         """Set the field_name on each field to it's label on the Resource."""
@@ -183,16 +264,102 @@ class Resource(Field):
     def reload(self):
         """Clears the data on the object and pulls new data from the API.
 
+        Inside a `batching.batch_loads` scope, a resource that was collected
+        by the batch is loaded together with the rest of the batch instead.
+
+        If the API reports the data hasn't changed since it was loaded (a
+        304 response to a conditional GET), the data is kept as it is and
+        only considered fresh again.
+
         Raises:
             LookupError: If the data retrieved is not for the id of this
                 Resource.
         """
+        if batching.load(self) and self.raw_data:
+            return
+
         data = self._fetch_data()
+        if data is NOT_MODIFIED:
+            self._last_loaded = datetime.now()
+            self._share_data()
+            return
+
         # Verify the data didn't change under us
         if data['id'] != self.id:
             raise LookupError('Did not find data for {}'.format(self.__str__()))
         self.raw_data = data
 
+    def save(self):
+        """Send the fields changed on the resource to the API.
+
+        Fields set on the resource are tracked as changes. Saving sends only
+        those fields in a PATCH and updates the resource with the data the
+        API returns::
+
+            project.name = "New name"
+            project.save()
+
+        Raises:
+            APIException: If the API refuses the changes.
+        """
+        if not self._changes:
+            return
+
+        for fieldname, value in self._changes.iteritems():
+            validate = getattr(self, "validate_{0}".format(fieldname), None)
+            if validate is not None:
+                validate(value)
+
+        data = dict((self._declared_fields[fieldname].source, value)
+                    for fieldname, value in self._changes.iteritems())
+        self.format_data(data)
+        response = api.request("patch", url=self.get_absolute_url(),
+                               data=data, client=self._client)
+        if not response.ok:
+            raise APIException("Could not save %s" % self, response=response)
+
+        if response.status_code != 204 and response.content:
+            self.raw_data = self.get_client().response_parser.parse(
+                response, many=False)
+        elif self.raw_data:
+            # No content returned, so apply the changes to the data we have.
+            updated = self._merge_changes()
+            if updated is None:
+                self.reload()
+            else:
+                self.raw_data = updated
+        self._changes = {}
+
+    def _merge_changes(self):
+        """Return the data with the changes applied, in the form the API
+        sends it in (nested resources as their data, datetimes as strings).
+
+        Returns:
+            The updated data, or None if a changed nested resource has no
+            data loaded to merge.
+        """
+        updated = dict(self.raw_data)
+        try:
+            for fieldname, value in self._changes.iteritems():
+                if isinstance(value, (list, tuple, ResourceList)):
+                    value = [_to_raw_value(item) for item in value]
+                else:
+                    value = _to_raw_value(value)
+                updated[self._declared_fields[fieldname].source] = value
+        except LookupError:
+            return None
+        return updated
+
+    def reload_async(self, callback=None):
+        """Reload the resource on the client's worker pool.
+
+        Returns:
+            An `AsyncResult`; call `.get()` on it to wait for the reload
+            to finish (and to re-raise any error it ran into).
+        """
+        pool = self.get_client().pool
+        return pool.apply_async(self.reload, callback=callback)
+
     @property
     def id(self):
         if self.raw_data:
@@ -207,16 +374,77 @@ class Resource(Field):
     @raw_data.setter
     def raw_data(self, data):
         self._last_loaded = datetime.now() if data else None
-        self._data_store = convert_from_utf8(data)
+        if self.__class__.COMPACT:
+            data = compact(data)
+        self._replace_data(data)
+        if data and self._parent is None:
+            self._share_data()
+
+    def _replace_data(self, data):
+        """Store new data, invalidating the field values computed from the
+        previous data."""
+        if data is not self._data_store:
+            self._data_store = data
+            self._data_version += 1
+
+    def _share_data(self):
+        """Share the loaded data with other instances of this resource."""
+        try:
+            pk = self._data_store['id']
+        except (KeyError, TypeError):
+            return
+        self.get_client().cache.set(type(self), pk, self._data_store,
+                                    self._last_loaded, self._validators)
+
+    def _load_shared_data(self, peek=False):
+        """Use the data another instance of this resource loaded, if fresh
+        and newer than this instance's.
+
+        Keyword Arguments:
+            peek (bool): Look the data up without marking it as recently
+                used in the cache, for the checks made on every read.
+
+        Returns:
+            True if fresh data was found, False if it still needs loading.
+        """
+        if self._parent is not None:
+            return False
+        try:
+            pk = self.id
+        except (KeyError, TypeError):
+            # Data without an id isn't shared.
+            return False
+        if pk is None:
+            return False
+
+        cache = self.get_client().cache
+        lookup = cache.peek if peek else cache.get
+        entry = lookup(type(self), pk)
+        if entry is None:
+            return False
+        elif self._last_loaded and entry.loaded <= self._last_loaded:
+            return False
+        elif datetime.now() - entry.loaded > self.__class__.DATA_EXPIRATION:
+            return False
+
+        self._replace_data(entry.data)
+        self._last_loaded = entry.loaded
+        self._validators = entry.validators
+        return True
+
+    def get_client(self):
+        """Return the client this resource is bound to."""
+        return self._client or get_default_client()
 
     @classmethod
-    def get_collection_url(cls):
+    def get_collection_url(cls, client=None):
         """Return the base collection url."""
-        return "{0}/{1}".format(settings.API_URL, cls._route)
+        client = client or get_default_client()
+        return "{0}/{1}".format(client.api_url, cls._route)
 
     def get_absolute_url(self):
         """Return the canonical API url for the resource."""
-        return "{0}/{1}".format(self.get_collection_url(), self.id)
+        return "{0}/{1}".format(self.get_collection_url(self._client), self.id)
 
     def delete(self):
         """Removes the resource by calling the API.
@@ -224,18 +452,33 @@ class Resource(Field):
         Raises:
             RequestException: If there's a problem with the request.
         """
-        response = api.request("delete", url=self.get_absolute_url())
+        response = api.request("delete", url=self.get_absolute_url(),
+                               client=self._client)
         if not response.ok:
             raise APIException("Could not delete %s" % self, response=response)
+        self.get_client().cache.discard(type(self), self.id)
+
+    def delete_async(self, callback=None):
+        """Remove the resource on the client's worker pool.
+
+        Returns:
+            An `AsyncResult`; call `.get()` on it to wait for the deletion
+            to finish (and to re-raise any error it ran into).
+        """
+        pool = self.get_client().pool
+        return pool.apply_async(self.delete, callback=callback)
 
     def _fetch_data(self):
         """GET the resource information from the API based on its primary key,
         unless the Resource has a parent resource.
 
         Retrieves the raw json body data from the response on resource GET.
+        If data has been loaded before, the GET is conditional on the ETag /
+        Last-Modified values the API sent along with it.
 
         Returns:
-            JSON representation of the resource.
+            JSON representation of the resource, or NOT_MODIFIED if the data
+            already loaded is still current.
 
         Raises:
             APIException -- If the request fails for some reason.
@@ -244,17 +487,42 @@ class Resource(Field):
             # If it has a parent instance, refer to that for it's data
             data = self.get_value_from_parent(self._parent)
         else:
-            response = api.request("get", url=self.get_absolute_url())
-            data = self.collection._extract_resource_data(response)[0]
+            response = api.request("get", url=self.get_absolute_url(),
+                                   client=self._client,
+                                   headers=self._get_conditional_headers())
+            if response.status_code == 304:
+                return NOT_MODIFIED
+
+            parser = self.get_client().response_parser
+            data = parser.parse(response, many=False)
+            self._validators = get_validators(response)
         return data
 
+    def _get_conditional_headers(self):
+        """Headers asking the API to only send the data if it has changed."""
+        if not (self.raw_data and self._validators):
+            return {}
+
+        headers = {}
+        etag, last_modified = self._validators
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
     def _get_field_from_raw_data(self, fieldname, *args, **kwargs):
         """Pulls the fieldname from the stored data.
 
         Finds the raw data for the given fieldname key. If no data has been
         loaded yet, load the data for the object first. If data has been
         previously loaded, confirm that the loading time is not outside the
-        dirty data time limit. If so, also reload the data.
+        dirty data time limit. If so, also reload the data. Fresh data
+        already loaded by another instance of the same resource is used
+        rather than reloading.
+
+        If `MAX_STALENESS` is set, stale data younger than it is returned
+        immediately and refreshed in the background instead.
 
         Args:
             fieldname (str): The key for the desired information.
@@ -265,8 +533,7 @@ class Resource(Field):
         Return:
             The raw data value for the desired fieldname key.
         """
-        if (self.raw_data and self._is_data_stale()) or not self.raw_data:
-            self.reload()
+        self._refresh_if_stale()
 
         if fieldname and fieldname not in self.raw_data:
             msg = "No '%s' field found on the resource. Available fields: %s"
@@ -275,6 +542,44 @@ class Resource(Field):
 
         return self.raw_data.get(fieldname)
 
+    def _refresh_if_stale(self):
+        """Load the data if there is none yet or if it's stale.
+
+        Fresh data is still replaced by newer data another instance of the
+        resource loaded (or saved) since.
+        """
+        if self.raw_data and not self._is_data_stale():
+            self._load_shared_data(peek=True)
+        elif not (self._load_shared_data() or self._revalidate()):
+            self.reload()
+
+    def _revalidate(self):
+        """Refresh stale data in the background, if it may still be used.
+
+        Only one background refresh per resource runs at a time.
+
+        Returns:
+            True if the stale data may be used for now, False if the caller
+            has to wait for fresh data.
+        """
+        max_staleness = self.__class__.MAX_STALENESS
+        if max_staleness is None or self._parent is not None:
+            return False
+        elif not self.raw_data or self.id is None:
+            return False
+        elif datetime.now() - self._last_loaded > max_staleness:
+            return False
+
+        key = ("revalidate", type(self), self.id)
+        self.get_client().run_once(key, self._reload_in_background)
+        return True
+
+    def _reload_in_background(self):
+        try:
+            self.reload()
+        except Exception:
+            logger.exception("Unable to refresh %s in the background", self)
+
     def _is_data_stale(self):
         """Checks to see if the data was last loaded over a set time limit.
 
@@ -289,6 +594,32 @@ class Resource(Field):
         return (datetime.now() - self._last_loaded) > expiration
 
 
+def _to_raw_value(value):
+    """Return a field value in the form the API sends it in.
+
+    Raises:
+        LookupError: If the value is a resource with no data loaded.
+    """
+    if isinstance(value, Resource):
+        if not value.raw_data:
+            raise LookupError("No data loaded for {0}".format(value))
+        return value.raw_data
+    elif isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def get_validators(response):
+    """Return the (ETag, Last-Modified) cache validators of the response.
+
+    Returns:
+        A tuple of the header values, or None if the response has neither.
+    """
+    headers = response.headers or {}
+    validators = (headers.get("ETag"), headers.get("Last-Modified"))
+    return validators if any(validators) else None
+
+
 class ListResource(Field):
     """
     ListResource is automatically inserted to replace any field created
@@ -299,6 +630,9 @@ class ListResource(Field):
     Since the ListResource serves as intermediary between all the parent and
     children it keep an internal `relationships` mapping to know which parent
     it needs to access for data when one of the children attempts to reload.
+    Each child also keeps a weak reference to its parent, and the data of
+    each parent is indexed by id, so that a child finds its data without
+    scanning every parent and every item.
     """
 
     def __init__(self, *args, **kwargs):
@@ -311,23 +645,34 @@ class ListResource(Field):
         self.child_resource = kwargs.pop('child_resource')
         super(ListResource, self).__init__(*args, **kwargs)
         self.relationships = WeakKeyDictionary()
+        self._indexes = WeakKeyDictionary()
 
     def to_representation(self, parent):
         """Formats and retrieve the representation of all children objects.
 
         This method retrieves all the data_set for this field from the parent,
-        and then creates a new instance of `child_resource` for each set of
-        data in the data_set. It then records the parent and associated
-        children in an internal relationships map it uses when children try to
-        refresh their data later.
+        and returns a lazy `ResourceList` over it, which creates an instance
+        of `child_resource` for an item of the data_set only once it's
+        accessed. It then records the parent and associated children in an
+        internal relationships map it uses when children try to refresh
+        their data later. The same children are returned until the parent's
+        data for this field changes.
         """
         parent_data = self.get_value_from_parent(parent)
-        klass = type(self.child_resource)
-        children = [klass(data=data, parent=self, field_name=self.field_name)
-                    for data in parent_data]
-        self.relationships[parent] = children
+        children = self.relationships.get(parent)
+        if children is None or children.data_set is not parent_data:
+            children = ResourceList(self, parent, parent_data)
+            self.relationships[parent] = children
         return children
 
+    def create_child(self, parent, data):
+        """Create the child resource for one item of the parent's data."""
+        klass = type(self.child_resource)
+        child = klass(data=data, parent=self, field_name=self.field_name,
+                      client=parent._client)
+        child._list_parent = ref(parent)
+        return child
+
     def _get_field_from_raw_data(self, fieldname, caller=None, *args, **kwargs):
         """Pulls the fieldname data from the associated parent.
 
@@ -353,11 +698,28 @@ class ListResource(Field):
 
         data_set = self.get_value_from_parent(parent)
 
-        for data in data_set:
-            if caller.id == data['id']:
-                return data
+        try:
+            return self._get_index(parent, data_set)[caller.id]
+        except KeyError:
+            raise LookupError('Did not find data for {}'.format(str(caller)))
 
-        raise LookupError('Did not find data for {}'.format(str(caller)))
+    def _get_index(self, parent, data_set):
+        """Return the parent's data for this field, keyed by id.
+
+        The index is rebuilt whenever the parent's data for this field is
+        replaced, e.g. when the parent reloads.
+        """
+        try:
+            indexed_set, index = self._indexes[parent]
+        except KeyError:
+            indexed_set = None
+
+        if indexed_set is not data_set:
+            index = {}
+            for data in data_set:
+                index.setdefault(data['id'], data)
+            self._indexes[parent] = (data_set, index)
+        return index
 
     def _get_associated_parent(self, caller):
         """Retrieves the parent associated with the calling instance.
@@ -365,8 +727,68 @@ class ListResource(Field):
         Raises:
             LookupError: If no associated parent is found.
         """
-        for parent in self.relationships:
-            if caller in self.relationships[parent]:
-                return parent
-        msg = 'Unable to find associated parent for one of many {}'
-        raise LookupError(msg.format(str(caller)))
+        parent_ref = getattr(caller, '_list_parent', None)
+        parent = parent_ref() if parent_ref is not None else None
+        if parent is None or parent not in self.relationships:
+            msg = 'Unable to find associated parent for one of many {}'
+            raise LookupError(msg.format(str(caller)))
+        return parent
+
+
+class ResourceList(Sequence):
+    """The children of a parent Resource for a `many=True` field.
+
+    Behaves like a read-only list, supporting indexing, slicing, `len` and
+    iteration, but only creates a child Resource once it's accessed. Taking
+    the `len` or the first item of a long list is cheap.
+
+    Args:
+        list_resource (ListResource): The field the children belong to.
+        parent (Resource): The parent whose data holds the children.
+        data_set (list): The parent's data for the field.
+    """
+
+    def __init__(self, list_resource, parent, data_set):
+        self.list_resource = list_resource
+        self.data_set = data_set
+        # Weak, since the list is kept in the field's relationships, keyed
+        # weakly by the parent.
+        self._parent_ref = ref(parent)
+        self._children = [None] * len(data_set)
+
+    def __len__(self):
+        return len(self.data_set)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get_child(i)
+                    for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('ResourceList index out of range')
+        return self._get_child(index)
+
+    def __eq__(self, other):
+        if not isinstance(other, (Sequence, list)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def _get_child(self, index):
+        child = self._children[index]
+        if child is None:
+            parent = self._parent_ref()
+            if parent is None:
+                raise LookupError('The parent of this list no longer exists')
+            child = self.list_resource.create_child(parent,
+                                                    self.data_set[index])
+            self._children[index] = child
+        return child
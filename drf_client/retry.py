@@ -0,0 +1,131 @@
+"""
+drf_client SDK: Retry
+
+Decides when a failed request is sent again and how long to wait first.
+Transient failures (a 503 while the API restarts, a reset connection) are
+retried with exponential backoff and jitter, so that many clients failing
+at once don't all come back at the same moment. A `Retry-After` sent by
+the API is honoured instead of the backoff.
+
+Only idempotent methods are retried automatically. POST requests are
+retried when asked for, e.g. `api.request("post", url, retry=True)`, or
+for every POST with the RETRY_POST setting.
+"""
+
+import random
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+import requests
+
+from drf_client import settings
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+
+class RetryPolicy(object):
+    """When and how to retry failed requests.
+
+    Settings which aren't given come from the RETRY_* settings.
+
+    Keyword Arguments:
+        max_attempts (int): The number of times a request is sent at most,
+            including the first. 1 disables retrying.
+        statuses (iterable): The response status codes worth retrying.
+        backoff (float): The delay before the first retry, in seconds. It
+            doubles with every further attempt.
+        max_backoff (float): The longest delay between two attempts. A
+            `Retry-After` longer than this isn't waited for; the response
+            is returned as it is instead.
+        jitter (bool): Wait a random time of up to the backoff instead of
+            the backoff itself ("full jitter").
+        retry_post (bool): Retry POST requests without being asked to.
+        sleep (callable): Waits for the given number of seconds.
+    """
+
+    # Failures where the request may not have reached the API.
+    errors = (requests.ConnectionError, requests.ConnectTimeout)
+    # Also a read timeout, where the API did get the request, which is only
+    # safe to send again if it's idempotent.
+    idempotent_errors = (requests.ConnectionError, requests.Timeout)
+
+    def __init__(self, max_attempts=None, statuses=None, backoff=None,
+                 max_backoff=None, jitter=None, retry_post=None,
+                 sleep=time.sleep):
+        self.max_attempts = _default(max_attempts, "RETRY_MAX_ATTEMPTS")
+        self.statuses = frozenset(_default(statuses, "RETRY_STATUSES"))
+        self.backoff = _default(backoff, "RETRY_BACKOFF")
+        self.max_backoff = _default(max_backoff, "RETRY_MAX_BACKOFF")
+        self.jitter = _default(jitter, "RETRY_JITTER")
+        self.retry_post = _default(retry_post, "RETRY_POST")
+        self.sleep = sleep
+
+    def applies_to(self, method, retry=None):
+        """Whether requests with the method may be retried.
+
+        Arguments:
+            method (str): The HTTP method of the request.
+            retry (bool): Set for a single request to force retrying on
+                (e.g. for a POST) or off. None leaves it to the policy.
+        """
+        if retry is not None:
+            return retry and self.max_attempts > 1
+        elif self.max_attempts <= 1:
+            return False
+        method = method.upper()
+        return method in IDEMPOTENT_METHODS or (
+            method == "POST" and self.retry_post)
+
+    def get_errors(self, method):
+        """The exceptions worth retrying requests with the method after."""
+        if method.upper() in IDEMPOTENT_METHODS:
+            return self.idempotent_errors
+        return self.errors
+
+    def is_retryable(self, response):
+        return response.status_code in self.statuses
+
+    def get_backoff(self, attempt):
+        """The time to wait after the given (failed) attempt, in seconds."""
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def get_delay(self, attempt, response):
+        """The time to wait before retrying the response, in seconds.
+
+        Returns:
+            The delay, or None if the API asked to wait for longer than
+            `max_backoff`.
+        """
+        retry_after = get_retry_after(response)
+        if retry_after is None:
+            return self.get_backoff(attempt)
+        elif retry_after > self.max_backoff:
+            return None
+        return retry_after
+
+
+def get_retry_after(response):
+    """Return the seconds the `Retry-After` header asks to wait, if any.
+
+    The header holds either a number of seconds or an HTTP date.
+    """
+    value = (response.headers or {}).get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, mktime_tz(parsed) - time.time())
+
+
+def _default(value, setting):
+    return getattr(settings, setting) if value is None else value
@@ -7,9 +7,51 @@ API_URL = "http://{host}".format(host=HOST)
 
 MAX_PAGINATION = 500
 
+# Lookups of many resources by id, see drf_client.api.in_bulk
+BULK_CHUNK_SIZE = 100
+BULK_LOOKUP_FILTER = "id__in"
+
+# Connection pooling, see drf_client.transport
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+POOL_BLOCK = False
+KEEP_ALIVE = True
+
+# Retrying failed requests, see drf_client.retry. 1 attempt disables it.
+RETRY_MAX_ATTEMPTS = 3
+RETRY_STATUSES = (429, 502, 503, 504)
+RETRY_BACKOFF = 0.5
+RETRY_MAX_BACKOFF = 30
+RETRY_JITTER = True
+RETRY_POST = False
+
+# Client side throttling per host, see drf_client.throttle. None for no
+# limit. HOST_LIMITS overrides them by host, e.g. {"example.com": {"rate": 5}}
+RATE_LIMIT = None
+RATE_BURST = None
+MAX_IN_FLIGHT = None
+HOST_LIMITS = {}
+
+# Send identical GETs made at the same time (same URL, parameters and
+# headers) only once, sharing the response. See drf_client.singleflight
+SINGLE_FLIGHT = True
+
+# Worker pool for concurrent requests, see drf_client.client.Client.pool
+MAX_WORKERS = 8
+PREFETCH_PAGES = 4
+# Bytes read at a time when decoding pages as they download, see
+# drf_client.api.iterate
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Shared resource data, see drf_client.cache. 0 entries disables it.
+CACHE_MAX_ENTRIES = 10000
+CACHE_MAX_BYTES = None
+
 RFC3339_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 DATETIME_FORMAT = RFC3339_FORMAT
 
 RESPONSE_PARSER = "drf_client.utils.ResponseParser"
+# "auto", "ujson", "simplejson", "json" or a JSONCodec, see drf_client.codec
+JSON_CODEC = "auto"
 
 AUTHENTICATION = AuthenticationBase()  # set by drf_client.auth
@@ -0,0 +1,65 @@
+"""
+drf_client SDK: Single flight
+
+Collapses identical calls made at the same time into one. When several
+threads reload the same resource at once, e.g. right after its data
+expired, only the first sends the request; the others wait for it and
+share its response (see `api.request`).
+"""
+
+import threading
+
+from drf_client.stats import Counters
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Runs a single call at a time for each key.
+
+    Keyword Arguments:
+        stats (Counters): Where to count the calls saved, under
+            "requests_saved".
+    """
+
+    def __init__(self, stats=None):
+        self.stats = stats if stats is not None else Counters()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """Call `func`, unless a call with the same key is in progress.
+
+        Returns:
+            The result of `func`, or that of the call in progress. If that
+            call raises, so do all the calls waiting for it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self.stats.increment("requests_saved")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
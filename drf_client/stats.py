@@ -0,0 +1,35 @@
+"""
+drf_client SDK: Stats
+
+Counters a client keeps about the requests it makes (retries, ...), for
+monitoring::
+
+    client.stats.snapshot()  # {"retries": 3, ...}
+"""
+
+import threading
+from collections import defaultdict
+
+
+class Counters(object):
+    """A thread safe set of named counters, all starting at 0."""
+
+    def __init__(self):
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        return self._counts.get(name, 0)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self):
+        """Return a copy of the current counts."""
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
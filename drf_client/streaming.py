@@ -0,0 +1,173 @@
+"""
+drf_client SDK: Streaming
+
+Decodes list responses while they download. Rather than waiting for the
+whole body and decoding it at once, the items of `results` are decoded
+and handed over one at a time as the chunks holding them arrive, so
+memory use stays around a single record whatever the page size::
+
+    page = StreamedPage(response.iter_content(chunk_size=65536))
+    for data in page:
+        process(data)
+    page.has_next  # Known once the page has been read.
+
+The standard library's decoder is used, since it can decode a value from
+the middle of a buffer.
+"""
+
+import codecs
+import json
+
+WHITESPACE = " \t\n\r"
+
+
+class StreamedPage(object):
+    """The results of one page of a list response, decoded incrementally.
+
+    Iterating over the page yields the data of each result. The other
+    members of the body (`count`, `next`, ...) are available in `body`
+    once the page has been read; for an unpaginated list it stays empty.
+
+    Arguments:
+        chunks (iterable): The body of the response, as chunks of bytes.
+    """
+
+    def __init__(self, chunks):
+        self.body = {}
+        self.found_results = False
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = u""
+        self._pos = 0
+        self._exhausted = False
+
+    @property
+    def count(self):
+        return self.body.get("count")
+
+    @property
+    def has_next(self):
+        return bool(self.body["next"]) if "next" in self.body else None
+
+    def __iter__(self):
+        start = self._next_char()
+        if start == "[":
+            self.found_results = True
+            for item in self._iter_array():
+                yield item
+        elif start == "{":
+            for item in self._iter_object():
+                yield item
+        else:
+            raise ValueError("Expected a JSON object or list")
+
+    def _iter_object(self):
+        while True:
+            char = self._next_char()
+            if char == "}":
+                return
+            elif char == ",":
+                continue
+
+            self._pos -= 1
+            key = self._decode_value()
+            if self._next_char() != ":":
+                raise ValueError("Expected ':' after {0!r}".format(key))
+
+            if key == "results" and self._peek_char() == "[":
+                self.found_results = True
+                self._next_char()
+                for item in self._iter_array():
+                    yield item
+            else:
+                self.body[key] = self._decode_value()
+
+    def _iter_array(self):
+        if self._peek_char() == "]":
+            self._next_char()
+            return
+
+        while True:
+            yield self._decode_value()
+            char = self._next_char()
+            if char == "]":
+                return
+            elif char != ",":
+                raise ValueError("Expected ',' or ']' in list")
+
+    def _decode_value(self):
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                # The value is cut short by the end of the chunks so far.
+                # Decoding starts over from the beginning of the value, so
+                # wait until the text to decode has doubled before trying
+                # again; retrying on every chunk is quadratic in the size
+                # of the record.
+                if not self._fill(2 * (len(self._buffer) - self._pos)):
+                    raise
+                continue
+
+            # A number (or literal) at the very end of the buffer may go on
+            # in the next chunk.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _next_char(self):
+        char = self._peek_char()
+        self._pos += 1
+        return char
+
+    def _peek_char(self):
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            raise ValueError("Unexpected end of the response")
+        return self._buffer[self._pos]
+
+    def _skip_whitespace(self):
+        while True:
+            while (self._pos < len(self._buffer) and
+                   self._buffer[self._pos] in WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return
+
+    def _fill(self, min_length=0):
+        """Read more of the body into the buffer, dropping what was consumed.
+
+        Arguments:
+            min_length (int): Keep reading until at least this much text is
+                left to consume, or the body ends. At least one chunk is
+                read either way.
+
+        Returns:
+            False if there's nothing left to read.
+        """
+        pieces = [self._buffer[self._pos:]]
+        length = len(pieces[0])
+        read = False
+        while not self._exhausted and (not read or length < min_length):
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._exhausted = True
+                text = self._text.decode(b"", final=True)
+            else:
+                text = self._text.decode(chunk)
+
+            if text:
+                pieces.append(text)
+                length += len(text)
+                read = True
+
+        if not read:
+            return False
+        # Joined once, rather than copying the buffer for every chunk.
+        self._buffer = u"".join(pieces)
+        self._pos = 0
+        return True
@@ -0,0 +1,223 @@
+"""
+drf_client SDK: Throttle
+
+Paces the requests sent to each API host so that fanning out over many
+resources doesn't run into the server's throttling. Every request of a
+client, whichever thread sends it, goes through the same `Governor`,
+which holds for each host:
+
+- a token bucket limiting the rate of requests (RATE_LIMIT per second,
+  with bursts of up to RATE_BURST), and
+- a semaphore limiting how many requests are in flight at once
+  (MAX_IN_FLIGHT).
+
+The limits adjust to what the API reports. A 429 pauses every request to
+the host until its `Retry-After` has passed and halves the rate, which
+then recovers gradually. Rate limit headers (`X-RateLimit-Remaining` and
+`X-RateLimit-Reset`, or their `RateLimit-*` equivalents) pause the host
+until the window resets once no requests remain in it; while some do,
+requests are sent at the configured rate. Limits can be set per host with
+the HOST_LIMITS setting::
+
+    HOST_LIMITS = {"api.example.com": {"rate": 5, "max_in_flight": 4}}
+"""
+
+import threading
+import time
+from urlparse import urlparse
+
+from drf_client.retry import get_retry_after
+
+# How long to pause a host for after a 429 without a Retry-After, in
+# seconds.
+DEFAULT_PAUSE = 1.0
+# The lowest rate a 429 brings the limit down to, per second.
+MIN_RATE = 0.1
+# The share of the configured rate regained after each successful request.
+RECOVERY = 0.05
+
+
+class TokenBucket(object):
+    """Limits the rate of requests, allowing for short bursts.
+
+    Arguments:
+        rate (float): The number of requests allowed per second. None for
+            no limit.
+        burst (int): The number of requests which may be sent at once
+            after a quiet period. Defaults to one second's worth.
+    """
+
+    def __init__(self, rate=None, burst=None, clock=time.time,
+                 sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst or max(1, rate or 1)
+        self.tokens = self.burst
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until a request may be sent.
+
+        Returns:
+            The time waited, in seconds.
+        """
+        waited = 0
+        while True:
+            with self._lock:
+                wait = self._reserve()
+            if wait <= 0:
+                return waited
+            self._sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """Hold every request back for the given time."""
+        with self._lock:
+            until = self._clock() + seconds
+            self._paused_until = max(self._paused_until, until)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def _reserve(self):
+        now = self._clock()
+        if now < self._paused_until:
+            return self._paused_until - now
+        elif self.rate is None:
+            return 0
+
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1.0 - self.tokens) / self.rate
+
+    def _refill(self):
+        now = self._clock()
+        if self.rate is not None:
+            elapsed = max(0, now - self._updated)
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+
+class HostLimiter(object):
+    """The rate and concurrency limits for a single host.
+
+    Used as a context manager around sending a request, followed by
+    `observe` with the response.
+
+    Keyword Arguments:
+        rate (float): Requests per second. None for no limit, though one
+            may still be set from the API's rate limit headers.
+        burst (int): See `TokenBucket`.
+        max_in_flight (int): Requests in flight at once. None for no limit.
+    """
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None,
+                 clock=time.time, sleep=time.sleep):
+        self.max_rate = rate
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self._clock = clock
+        self._semaphore = (threading.BoundedSemaphore(max_in_flight)
+                           if max_in_flight else None)
+
+    def __enter__(self):
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        try:
+            self.bucket.acquire()
+        except BaseException:
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def observe(self, response):
+        """Adjust the limits to the response.
+
+        Returns:
+            True if the API throttled the request.
+        """
+        if response.status_code == 429:
+            retry_after = get_retry_after(response)
+            self.bucket.pause(DEFAULT_PAUSE if retry_after is None
+                              else retry_after)
+            if self.bucket.rate is not None:
+                self.bucket.set_rate(max(MIN_RATE, self.bucket.rate / 2.0))
+            return True
+
+        window = self._get_window(response)
+        if window is not None and window[0] <= 0:
+            # The quota is used up, so wait for the window to reset rather
+            # than be throttled. Pacing by the quota left instead would slow
+            # every request down long before it runs out (e.g. 1000 requests
+            # an hour would mean one every 3.6s).
+            self.bucket.pause(window[1])
+        elif self.max_rate is not None and self.bucket.rate < self.max_rate:
+            rate = self.bucket.rate + self.max_rate * RECOVERY
+            self.bucket.set_rate(min(self.max_rate, rate))
+        return False
+
+    def _get_window(self, response):
+        """Return the requests remaining and the seconds until the rate
+        limit window resets, if the response reports them."""
+        headers = response.headers or {}
+        for prefix in ("X-RateLimit-", "RateLimit-"):
+            remaining = headers.get(prefix + "Remaining")
+            reset = headers.get(prefix + "Reset")
+            if not (isinstance(remaining, basestring) and
+                    isinstance(reset, basestring)):
+                continue
+            try:
+                remaining, reset = float(remaining), float(reset)
+            except ValueError:
+                continue
+            if reset > 1e9:
+                # An epoch timestamp rather than a number of seconds.
+                reset -= self._clock()
+            return remaining, max(0.0, reset)
+        return None
+
+
+class Governor(object):
+    """Hands out the `HostLimiter` of each host requests are sent to.
+
+    Keyword Arguments:
+        rate (float): Requests per second to each host. None for no limit.
+        burst (int): See `TokenBucket`.
+        max_in_flight (int): Requests in flight to each host at once.
+        hosts (dict): Overrides of the limits above, by host name (with
+            the port, if the URLs include it).
+    """
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None,
+                 hosts=None, clock=time.time, sleep=time.sleep):
+        self.defaults = {"rate": rate, "burst": burst,
+                         "max_in_flight": max_in_flight}
+        self.hosts = hosts or {}
+        self._clock = clock
+        self._sleep = sleep
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get_limiter(self, url):
+        host = urlparse(url).netloc
+        try:
+            return self._limiters[host]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if host not in self._limiters:
+                limits = dict(self.defaults, **self.hosts.get(host, {}))
+                self._limiters[host] = HostLimiter(
+                    clock=self._clock, sleep=self._sleep, **limits)
+            return self._limiters[host]
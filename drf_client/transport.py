@@ -0,0 +1,156 @@
+"""
+drf_client SDK: Transport
+
+Keeps a pooled HTTP session around so connections to the API are reused
+across requests instead of being opened and torn down for every call.
+Transient failures are retried according to a `RetryPolicy`, and requests
+are paced per host by a `Governor`.
+"""
+
+import cookielib
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from drf_client import settings
+from drf_client.retry import RetryPolicy
+from drf_client.stats import Counters
+from drf_client.throttle import Governor
+
+
+class Transport(object):
+    """A pooled connection to the API.
+
+    Keyword Arguments:
+        pool_connections (int): The number of per-host connection pools
+            to cache.
+        pool_maxsize (int): The maximum number of connections kept alive
+            in each host's pool.
+        pool_block (bool): Whether to wait for a free connection when the
+            pool is exhausted instead of opening a throwaway one.
+        keep_alive (bool): Whether to keep connections open between
+            requests. When False, every request asks the server to close
+            the connection once it's done.
+        retry (RetryPolicy): When to retry failed requests. Defaults to a
+            policy built from the RETRY_* settings.
+        governor (Governor): Limits the rate and concurrency of requests
+            to each host. Defaults to one built from the throttling
+            settings.
+        stats (Counters): Where to count retries, for monitoring.
+    """
+
+    def __init__(self, pool_connections=None, pool_maxsize=None,
+                 pool_block=None, keep_alive=None, retry=None, governor=None,
+                 stats=None):
+        if pool_connections is None:
+            pool_connections = settings.POOL_CONNECTIONS
+        if pool_maxsize is None:
+            pool_maxsize = settings.POOL_MAXSIZE
+        if pool_block is None:
+            pool_block = settings.POOL_BLOCK
+        if keep_alive is None:
+            keep_alive = settings.KEEP_ALIVE
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+        self.retry = retry if retry is not None else RetryPolicy()
+        if governor is None:
+            governor = Governor(rate=settings.RATE_LIMIT,
+                                burst=settings.RATE_BURST,
+                                max_in_flight=settings.MAX_IN_FLIGHT,
+                                hosts=settings.HOST_LIMITS)
+        self.governor = governor
+        self.stats = stats if stats is not None else Counters()
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The `requests.Session` backing this transport, created on demand."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                              pool_maxsize=self.pool_maxsize,
+                              pool_block=self.pool_block)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        # Requests are authenticated by the client's credentials alone. A
+        # session cookie kept from an earlier response could authenticate
+        # later requests as someone else (e.g. after set_token).
+        session.cookies.set_policy(
+            cookielib.DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def request(self, method, url, retry=None, **kwargs):
+        """Send the request over the pooled session, retrying on failure.
+
+        Every retry is counted under "retries" in `stats`, and requests
+        which still failed after the last attempt under "retries_exhausted".
+        Each attempt waits for the host's governor first, and responses
+        throttled by the API (429) are counted under "throttled".
+
+        Arguments:
+            method (str): The HTTP method to use for the request (e.g. "post")
+            url (str): The address for the expected resource.
+
+        Keyword Arguments:
+            retry (bool): Force retrying on (e.g. for a POST) or off for this
+                request. By default the retry policy decides by method.
+
+        Returns:
+            Response object.
+        """
+        send = getattr(self.session, method.lower())
+        policy = self.retry
+        if not policy.applies_to(method, retry):
+            return self._send(send, url, kwargs)
+
+        errors = policy.get_errors(method)
+        attempt = 1
+        while True:
+            try:
+                response = self._send(send, url, kwargs)
+            except errors:
+                if attempt >= policy.max_attempts:
+                    self.stats.increment("retries_exhausted")
+                    raise
+                delay = policy.get_backoff(attempt)
+            else:
+                if not policy.is_retryable(response):
+                    return response
+                delay = policy.get_delay(attempt, response)
+                if attempt >= policy.max_attempts or delay is None:
+                    self.stats.increment("retries_exhausted")
+                    return response
+                # Release the connection before waiting.
+                response.close()
+
+            self.stats.increment("retries")
+            policy.sleep(delay)
+            attempt += 1
+
+    def _send(self, send, url, kwargs):
+        limiter = self.governor.get_limiter(url)
+        with limiter:
+            response = send(url, **kwargs)
+        if limiter.observe(response):
+            self.stats.increment("throttled")
+        return response
+
+    def close(self):
+        """Close every pooled connection. The transport stays usable."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
@@ -5,9 +5,18 @@ Contains various utility classes and functions.
 """
 import json
 import requests
-import pydoc
+from collections import namedtuple
 from drf_client import auth, settings
+from drf_client.client import get_default_client
 from drf_client.exceptions import APIException
+from drf_client.records import Record
+from drf_client.streaming import StreamedPage
+
+try:
+    _unicode = unicode
+except NameError:
+    # Python 3, where the decoded JSON is already made of native strings.
+    _unicode = None
 
 
 def convert_to_ids(resources):
@@ -28,22 +37,52 @@ def clamp(value, minimum=0, maximum=None):
     return max(value, minimum)
 
 
+def chunked(iterable, size):
+    """Split an iterable into lists of at most `size` items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def unique(iterable):
+    """Yield each distinct item of the iterable once, in order."""
+    seen = set()
+    for item in iterable:
+        if item not in seen:
+            seen.add(item)
+            yield item
+
+
 def convert_from_utf8(original):
-    '''Converts unicode based dict to a python str based dict.'''
-    if isinstance(original, dict):
+    '''Converts unicode based dict to a python str based dict.
+
+    This copies every nested dict and list, so it's applied to the values
+    read through fields rather than to whole payloads.
+    '''
+    if _unicode is None:
+        return original
+    elif isinstance(original, (dict, Record)):
         return {convert_from_utf8(key): convert_from_utf8(value)
                 for key, value in original.iteritems()}
     elif isinstance(original, list):
         return [convert_from_utf8(element) for element in original]
-    elif isinstance(original, unicode):
+    elif isinstance(original, _unicode):
         return original.encode('utf-8')
     else:
         return original
 
 
-def parse_resources(cls, response, many=True):
+def parse_resources(cls, response, many=True, client=None):
     """Creates resource instances from the response.
 
+    The parser is looked up from the RESPONSE_PARSER setting of the client
+    and the resources created are bound to that client.
+
     Raises:
         APIException -- If the response fails, the response is
             badly formatted, or if the response is missing information.
@@ -51,22 +90,33 @@ def parse_resources(cls, response, many=True):
     Returns:
         A set of instantiated resources.
     """
-    # from http://stackoverflow.com/questions/547829
-    Parser = pydoc.locate(settings.RESPONSE_PARSER)
-    resource_data = Parser().parse(response, many=many)
+    parser = (client or get_default_client()).response_parser
+    resource_data = parser.parse(response, many=many)
     if many:
-        return [cls(data=data) for data in resource_data]
+        return [cls(data=data, client=client) for data in resource_data]
     else:
-        return cls(data=resource_data)
+        return cls(data=resource_data, client=client)
+
+
+Page = namedtuple("Page", ["results", "count", "has_next"])
 
 
 class ResponseParser(object):
+    """Extracts resource data from the API's responses.
+
+    Keyword Arguments:
+        codec (JSONCodec): Decodes the response bodies. Without one, the
+            response's own `json()` is used.
+    """
+
+    def __init__(self, codec=None):
+        self.codec = codec
 
     def parse(self, response, many=True):
         if not response.ok:
             raise APIException("Unsuccessful response", response)
 
-        body = response.json()
+        body = self.decode(response)
         data = self.get_data(body, many=many)
         if not data:
             raise APIException('Unable to find results', response)
@@ -74,8 +124,54 @@ class ResponseParser(object):
             raise APIException("Response did not return a list", response)
         return data
 
+    def parse_page(self, response):
+        """Parse one page of a paginated list response.
+
+        Unlike `parse`, an empty page is not an error since it simply marks
+        the end of the collection.
+
+        Returns:
+            A `Page` of the results along with the total `count` and whether
+            there is a next page, if the response includes them (otherwise
+            they're None).
+        """
+        if not response.ok:
+            raise APIException("Unsuccessful response", response)
+
+        body = self.decode(response)
+        data = self.get_data(body, many=True)
+        if data is None:
+            raise APIException('Unable to find results', response)
+        elif not isinstance(data, list):
+            raise APIException("Response did not return a list", response)
+
+        has_next = bool(body['next']) if 'next' in body else None
+        return Page(data, body.get('count'), has_next)
+
+    def stream_page(self, response, chunk_size):
+        """Parse one page of a list response while it downloads.
+
+        The response must have been requested with `stream=True`. Its
+        results are decoded one at a time as they arrive, see
+        `drf_client.streaming`.
+
+        Returns:
+            A `StreamedPage`, iterate over it for the data of each result.
+        """
+        if not response.ok:
+            raise APIException("Unsuccessful response", response)
+        return StreamedPage(response.iter_content(chunk_size=chunk_size))
+
+    def decode(self, response):
+        """Return the decoded body of the response."""
+        if self.codec is None:
+            return response.json()
+        return self.codec.decode(response.content)
+
     def get_data(self, body, many):
-        if not many:
+        if not many or isinstance(body, list):
+            # Unpaginated lists, such as the response to a bulk create,
+            # are returned as they are.
             return body
 
         try:
@@ -1,7 +1,13 @@
 import pytest
 from drf_client import auth
+from drf_client.client import get_default_client
 
 
 @pytest.fixture
 def authenticate():
     auth.set_token("abcdef")
+
+
+@pytest.fixture
+def clear_cache():
+    get_default_client().cache.clear()
@@ -1,3 +1,5 @@
+import json
+
 from mock import Mock, patch
 from drf_client.resources import Resource
 
@@ -13,9 +15,30 @@ def mock_response(ok=True, reason='', text='', body='', headers='',
     response.body = body
     response.headers = headers
     response.json.return_value = json_value
+    response.content = json.dumps(json_value)
+    response.iter_content.side_effect = lambda chunk_size=1: iter_chunks(
+        response.content, chunk_size)
     return response
 
 
+def iter_chunks(content, chunk_size):
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
+
+
+class FakeClock(object):
+    """Stands in for time.time, only moving on when slept on."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
 class BaseResourceTest(object):
 
     ResourceClass = None
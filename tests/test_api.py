@@ -1,9 +1,15 @@
+import math
+import time
+from array import array
+
 import pytest
 from mock import patch, Mock
 
-from drf_client import utils, api, settings
-from drf_client.exceptions import APIException
+from drf_client import utils, api, fields, settings
+from drf_client.client import Client, get_default_client
+from drf_client.exceptions import APIException, BulkOperationError
 from drf_client.resources import Resource
+from .helpers import RFC3339_TIME, mock_response
 
 
 class TestGet:
@@ -56,12 +62,405 @@ class TestGet:
         Resource._route = Mock()
         assert api.get(cls=Resource) == "foo"
         assert request_mock.called
-        parse_mock.assert_called_once_with(Resource, "baz")
+        parse_mock.assert_called_once_with(Resource, "baz",
+                                           client=get_default_client())
+
+    def test_limit_defaults_to_client_max_pagination(self):
+        client = Client(max_pagination=20)
+        params = self._get_params(client=client, limit=50)
+        assert params['limit'] == 20
+
+
+def _page_response(ids, count=None, next_url=None):
+    body = {"results": [{"id": x} for x in ids]}
+    if count is not None:
+        body.update(count=count, next=next_url)
+    return mock_response(json_value=body)
+
+
+class TestIterate:
+
+    @patch.object(api, "request")
+    def test_yields_resources_across_pages(self, request_mock):
+        request_mock.side_effect = [
+            _page_response([1, 2], count=3, next_url="page2"),
+            _page_response([3], count=3),
+        ]
+        resources = list(api.iterate(Resource, page_size=2, prefetch=0))
+        assert [resource.id for resource in resources] == [1, 2, 3]
+        offsets = [kwargs['params']['offset']
+                   for _, kwargs in request_mock.call_args_list]
+        assert offsets == [0, 2]
+
+    @patch.object(api, "request")
+    def test_pages_are_fetched_on_demand(self, request_mock):
+        request_mock.side_effect = [
+            _page_response([1, 2], count=4, next_url="page2"),
+            _page_response([3, 4], count=4),
+        ]
+        resources = api.iterate(Resource, page_size=2, prefetch=0)
+        assert next(resources).id == 1
+        assert next(resources).id == 2
+        assert request_mock.call_count == 1
+        assert next(resources).id == 3
+        assert request_mock.call_count == 2
+
+    @patch.object(api, "request")
+    def test_stops_on_short_page_without_pagination_info(self, request_mock):
+        request_mock.side_effect = [_page_response([1, 2]), _page_response([3])]
+        assert len(list(api.iterate(Resource, page_size=2))) == 3
+        assert request_mock.call_count == 2
+
+    @patch.object(api, "request")
+    def test_empty_collection_yields_nothing(self, request_mock):
+        request_mock.return_value = _page_response([], count=0)
+        assert list(api.iterate(Resource)) == []
+
+    @patch.object(api, "request")
+    def test_filters_are_passed_to_every_page(self, request_mock):
+        request_mock.side_effect = [
+            _page_response([1], count=2, next_url="page2"),
+            _page_response([2], count=2),
+        ]
+        list(api.iterate(Resource, page_size=1, name="foo"))
+        for _, kwargs in request_mock.call_args_list:
+            assert kwargs['params']['name'] == "foo"
+            assert kwargs['params']['limit'] == 1
+
+    def _offset_pages(self, count, page_size, delays=None):
+        """Fake a collection of `count` resources served by offset."""
+        def respond(*args, **kwargs):
+            offset = kwargs['params']['offset']
+            if delays:
+                time.sleep(delays.get(offset, 0))
+            ids = range(offset, min(offset + page_size, count))
+            next_url = "next" if offset + page_size < count else None
+            return _page_response(ids, count=count, next_url=next_url)
+        return respond
+
+    @patch.object(api, "request")
+    def test_prefetch_returns_results_in_order(self, request_mock):
+        # Make earlier pages slower so they complete out of order.
+        delays = {2: 0.03, 4: 0.02}
+        request_mock.side_effect = self._offset_pages(10, 2, delays)
+        resources = api.iterate(Resource, page_size=2, prefetch=3)
+        assert [resource.id for resource in resources] == list(range(10))
+        assert request_mock.call_count == 5
+
+    @patch.object(api, "request")
+    def test_prefetch_is_bounded(self, request_mock):
+        request_mock.side_effect = self._offset_pages(20, 2)
+        resources = api.iterate(Resource, page_size=2, prefetch=2)
+        next(resources)
+        time.sleep(0.05)
+        # The first page plus at most two pages ahead.
+        assert request_mock.call_count == 3
+
+    @patch.object(api, "request")
+    def test_prefetch_steps_by_size_of_returned_page(self, request_mock):
+        # The server caps pages at 2 even though 5 were requested.
+        request_mock.side_effect = self._offset_pages(6, 2)
+        resources = list(api.iterate(Resource, page_size=5, prefetch=2))
+        assert [resource.id for resource in resources] == list(range(6))
+
+
+class TestStreamedIterate:
+
+    @patch.object(api, "request")
+    def test_results_are_streamed_across_pages(self, request_mock):
+        first = _page_response([1, 2], count=3, next_url="page2")
+        second = _page_response([3], count=3)
+        request_mock.side_effect = [first, second]
+        resources = list(api.iterate(Resource, page_size=2, stream=True))
+        assert [resource.id for resource in resources] == [1, 2, 3]
+        assert all(kwargs['stream'] for _, kwargs in request_mock.call_args_list)
+        offsets = [kwargs['params']['offset']
+                   for _, kwargs in request_mock.call_args_list]
+        assert offsets == [0, 2]
+        assert first.close.called and second.close.called
+
+    @patch.object(api, "request")
+    def test_results_are_handed_out_before_page_is_read(self, request_mock):
+        response = _page_response([1, 2])
+        request_mock.return_value = response
+        resources = api.iterate(Resource, page_size=5, stream=True)
+        assert next(resources).id == 1
+        assert not response.close.called
+
+    @patch.object(api, "request")
+    def test_response_without_results_raises(self, request_mock):
+        request_mock.return_value = mock_response(json_value={"detail": "x"})
+        with pytest.raises(APIException):
+            list(api.iterate(Resource, stream=True))
+
+
+class NamedResource(Resource):
+    _route = "named"
+
+    name = fields.Field()
+
+
+class SourcedResource(Resource):
+    _route = "sourced"
+
+    name = fields.Field(source="full_name")
+
+
+class ColumnResource(Resource):
+    _route = "columns"
+
+    score = fields.Field()
+    label = fields.Field()
+    created = fields.DateTimeField()
+    parent = NamedResource()
+
+
+class TestToColumns:
+
+    def _rows(self):
+        return [
+            {"id": 1, "score": 3, "label": u"a", "created": RFC3339_TIME,
+             "parent": {"id": 7}},
+            {"id": 2, "score": 4.5, "label": None, "created": None,
+             "parent": 8},
+            {"id": 3, "score": None, "label": u"c", "created": RFC3339_TIME,
+             "parent": None},
+        ]
+
+    @patch.object(api, "request")
+    def test_pages_are_streamed_into_columns(self, request_mock):
+        rows = self._rows()
+        request_mock.side_effect = [
+            mock_response(json_value={"results": rows[:2], "count": 3, "next": "2"}),
+            mock_response(json_value={"results": rows[2:], "count": 3, "next": None}),
+        ]
+        with patch.object(ColumnResource, "__init__") as init_mock:
+            columns = api.to_columns(ColumnResource, page_size=2, prefetch=0)
+        assert not init_mock.called
+        assert list(columns) == ["id", "score", "label", "created", "parent"]
+        assert columns["id"] == array("l", [1, 2, 3])
+        assert columns["score"][:2] == array("d", [3, 4.5])
+        assert math.isnan(columns["score"][2])
+        assert columns["label"] == ["a", None, "c"]
+        assert columns["created"][0] == fields.DateTimeField.to_datetime(RFC3339_TIME)
+        assert columns["created"][1] is None
+        assert columns["parent"][:2] == array("d", [7, 8])
+
+    @patch.object(api, "request")
+    def test_only_requested_fields_are_exported(self, request_mock):
+        request_mock.return_value = mock_response(json_value={"results": self._rows()})
+        columns = api.to_columns(ColumnResource, ["label"])
+        assert list(columns) == ["id", "label"]
+
+    def test_unknown_fields_raise_value_error(self):
+        with pytest.raises(ValueError):
+            api.to_columns(ColumnResource, ["missing"])
+
+    @patch.object(api, "request")
+    def test_numpy_arrays(self, request_mock):
+        numpy = pytest.importorskip("numpy")
+        request_mock.return_value = mock_response(json_value={"results": self._rows()})
+        columns = api.to_columns(ColumnResource, ["score", "created"], as_numpy=True)
+        assert columns["id"].dtype == numpy.dtype("l")
+        assert columns["created"].dtype == numpy.dtype("datetime64[us]")
+
+
+class TestInBulk:
+
+    @patch.object(api, "request")
+    def test_ids_are_sent_as_list_filter(self, request_mock):
+        request_mock.return_value = _page_response([1, 2])
+        resources = api.in_bulk(Resource, [1, 2])
+        (_, kwargs) = request_mock.call_args
+        assert kwargs['params']['id__in'] == "1,2"
+        assert sorted(resources) == [1, 2]
+        assert resources[2].id == 2
+
+    @patch.object(api, "request")
+    def test_ids_are_chunked(self, request_mock):
+        request_mock.side_effect = [_page_response([1, 2]), _page_response([3])]
+        resources = api.in_bulk(Resource, [1, 2, 2, 3], chunk_size=2)
+        assert request_mock.call_count == 2
+        last_params = request_mock.call_args[1]['params']
+        assert last_params['id__in'] == "3"
+        assert sorted(resources) == [1, 2, 3]
+
+    @patch.object(api, "request")
+    def test_filter_name_can_be_changed(self, request_mock):
+        request_mock.return_value = _page_response([1])
+        api.in_bulk(Resource, [1], filter_name="pk__in")
+        assert request_mock.call_args[1]['params']['pk__in'] == "1"
+
+    @patch.object(api, "request")
+    def test_missing_ids_are_left_out(self, request_mock):
+        request_mock.return_value = _page_response([])
+        assert api.in_bulk(Resource, [1]) == {}
+
+
+class TestBulkCreate:
+
+    @patch.object(api, "request")
+    def test_records_are_posted_as_lists_in_batches(self, request_mock):
+        request_mock.side_effect = [mock_response(json_value=[{"id": 1}, {"id": 2}]),
+                                    mock_response(json_value=[{"id": 3}])]
+        records = [{"name": "a"}, {"name": "b"}, {"name": "c"}]
+        resources = api.bulk_create(Resource, records, batch_size=2)
+        assert [resource.id for resource in resources] == [1, 2, 3]
+        sent = [kwargs['data'] for _, kwargs in request_mock.call_args_list]
+        assert sent == [records[:2], records[2:]]
+
+    @patch.object(api, "request")
+    @patch.object(Resource, "run_validation", side_effect=[None, ValueError])
+    def test_nothing_is_sent_if_any_record_is_invalid(self, validation_mock,
+                                                      request_mock):
+        with pytest.raises(ValueError):
+            api.bulk_create(Resource, [{"name": "a"}, {}])
+        assert not request_mock.called
+
+    @patch.object(api, "request")
+    def test_records_posted_one_by_one_without_bulk(self, request_mock):
+        def respond(method, url, data, client):
+            return mock_response(json_value={"id": data["id"]})
+        request_mock.side_effect = respond
+        records = [{"id": pk} for pk in range(5)]
+        resources = api.bulk_create(Resource, records, bulk=False)
+        assert [resource.id for resource in resources] == list(range(5))
+        assert request_mock.call_count == 5
+
+    @patch.object(api, "request")
+    def test_created_resources_are_kept_when_one_by_one_fails(self, request_mock):
+        def respond(method, url, data, client):
+            if data["id"] == 2:
+                return mock_response(ok=False, text="nope")
+            return mock_response(json_value={"id": data["id"]})
+        request_mock.side_effect = respond
+        records = [{"id": pk} for pk in range(4)]
+        with pytest.raises(BulkOperationError) as error:
+            api.bulk_create(Resource, records, bulk=False)
+        assert request_mock.call_count == 4
+        assert error.value.errors[0][0] == {"id": 2}
+        assert [resource and resource.id for resource in error.value.results] == \
+            [0, 1, None, 3]
+
+
+def _respond_by_url(failing_urls=()):
+    def respond(method, url, **kwargs):
+        if url in failing_urls:
+            return mock_response(ok=False, text="nope")
+        data = kwargs.get('data') or {"id": int(url.rsplit("/", 1)[-1])}
+        return mock_response(json_value=dict(data, id=int(url.rsplit("/", 1)[-1])))
+    return respond
+
+
+class TestDeleteMany:
+
+    @patch.object(api, "request")
+    def test_each_resource_is_deleted(self, request_mock):
+        request_mock.side_effect = _respond_by_url()
+        api.delete_many(NamedResource, [1, NamedResource(id=2)])
+        urls = sorted(kwargs['url'] for _, kwargs in request_mock.call_args_list)
+        assert urls == [NamedResource(id=1).get_absolute_url(),
+                        NamedResource(id=2).get_absolute_url()]
+
+    @patch.object(api, "request")
+    def test_failures_are_gathered(self, request_mock):
+        failing = NamedResource(id=2).get_absolute_url()
+        request_mock.side_effect = _respond_by_url([failing])
+        with pytest.raises(BulkOperationError) as error:
+            api.delete_many(NamedResource, [1, 2, 3])
+        assert request_mock.call_count == 3
+        assert [item.id for item, _ in error.value.errors] == [2]
+        assert "1 failed" in str(error.value)
+        assert error.value.args == ("Could not delete every resource",)
+
+    @patch.object(api, "request")
+    def test_bulk_deletes_by_filter(self, request_mock):
+        request_mock.return_value = mock_response()
+        api.delete_many(NamedResource, [1, 2, 3], bulk=True, chunk_size=2)
+        params = sorted(kwargs['params']['id__in']
+                        for _, kwargs in request_mock.call_args_list)
+        assert params == ["1,2", "3"]
+        for args, kwargs in request_mock.call_args_list:
+            assert args == ("delete",)
+            assert kwargs['url'] == NamedResource.get_collection_url()
+
+
+class TestUpdateMany:
+
+    @patch.object(api, "request")
+    def test_each_resource_is_patched(self, request_mock):
+        request_mock.side_effect = _respond_by_url()
+        resources = api.update_many(NamedResource, {1: {"name": "a"},
+                                                    2: {"name": "b"}})
+        assert sorted((r.id, r.raw_data["name"]) for r in resources) == \
+            [(1, "a"), (2, "b")]
+        for args, kwargs in request_mock.call_args_list:
+            assert args == ("patch",)
+
+    @patch.object(api, "request")
+    def test_failures_are_gathered(self, request_mock):
+        failing = NamedResource(id=1).get_absolute_url()
+        request_mock.side_effect = _respond_by_url([failing])
+        with pytest.raises(BulkOperationError) as error:
+            api.update_many(NamedResource, [(1, {"name": "a"}), (2, {"name": "b"})])
+        assert request_mock.call_count == 2
+        assert len(error.value.errors) == 1
+
+    @patch.object(api, "request")
+    def test_unknown_fields_are_rejected_before_sending(self, request_mock):
+        with pytest.raises(ValueError):
+            api.update_many(NamedResource, {1: {"name": "a", "foo": "b"}})
+        assert not request_mock.called
+
+    @patch.object(api, "request")
+    def test_bulk_patches_collection_with_ids(self, request_mock):
+        request_mock.return_value = mock_response(json_value=[{"id": 1, "name": "a"}])
+        resources = api.update_many(NamedResource, {1: {"name": "a"}}, bulk=True)
+        (args, kwargs) = request_mock.call_args
+        assert args == ("patch",)
+        assert kwargs['url'] == NamedResource.get_collection_url()
+        assert kwargs['data'] == [{"id": 1, "name": "a"}]
+        assert resources[0].id == 1
+
+    @patch.object(api, "request")
+    def test_bulk_sends_the_source_of_each_field(self, request_mock):
+        request_mock.return_value = mock_response(json_value=[{"id": 1}])
+        api.update_many(SourcedResource, {1: {"name": "a"}}, bulk=True)
+        assert request_mock.call_args[1]['data'] == [{"id": 1, "full_name": "a"}]
+
+
+class TestAsync:
+
+    @patch.object(api, "get", return_value="foo")
+    def test_get_async_runs_get_on_pool(self, get_mock):
+        result = api.get_async(Resource, offset=5)
+        assert result.get(timeout=1) == "foo"
+        get_mock.assert_called_once_with(Resource, offset=5, client=None)
+
+    @patch.object(api, "get", return_value="foo")
+    def test_get_async_calls_callback(self, get_mock):
+        callback = Mock()
+        api.get_async(Resource, callback=callback).wait(timeout=1)
+        callback.assert_called_once_with("foo")
+
+    @patch.object(api, "get", side_effect=ValueError("boom"))
+    def test_get_async_reraises_errors_on_get(self, get_mock):
+        result = api.get_async(Resource)
+        with pytest.raises(ValueError):
+            result.get(timeout=1)
+
+    @patch.object(api, "create", return_value="bar")
+    def test_create_async_runs_create_on_pool(self, create_mock):
+        client = Client()
+        result = api.create_async(Resource, client=client, name="foo")
+        assert result.get(timeout=1) == "bar"
+        create_mock.assert_called_once_with(Resource, client=client, name="foo")
 
 
 class TestCreate:
 
     def _create_resource_and_ignore_errors(self, **data):
+        api.request.return_value = mock_response()
         try:
             api.create(cls=Resource, **data)
         except APIException:
@@ -80,12 +479,13 @@ class TestCreate:
     def test_calls_request_with_post_and_collection_url(self, url_mock, request_mock):
         data = {"foo": "bar"}
         self._create_resource_and_ignore_errors(**data)
-        request_mock.assert_called_with("post", url=url_mock.return_value, data=data)
+        request_mock.assert_called_with("post", url=url_mock.return_value, data=data,
+                                        client=None)
 
 
 class TestRequestMethod:
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_params_are_passed_to_request(self, get_mock):
         resource = Resource()
         params = {"foo": True}
@@ -93,7 +493,7 @@ class TestRequestMethod:
         args, kwargs = get_mock.call_args
         assert kwargs["params"] == params
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_request_calls_requests_with_specified_method(self, get_mock):
         method = "get"
         url = "foo"
@@ -101,7 +501,17 @@ class TestRequestMethod:
         get_mock.assert_called_once_with(url, verify=settings.VERIFY_SSL)
 
 
-@patch('requests.post')
+@patch("requests.Session.get")
+def test_request_uses_client_settings_and_auth(get_mock):
+    client = Client(verify_ssl=False)
+    client.set_token("abcdef")
+    api.request("get", url="foo", client=client)
+    (_, called_kwargs) = get_mock.call_args
+    assert called_kwargs['verify'] is False
+    assert called_kwargs['headers']['Authorization'] == "Token abcdef"
+
+
+@patch("requests.Session.post")
 def test_request_uses_expected_ssl_settings(request_mock):
     for setting in (True, False):
         settings.VERIFY_SSL = setting
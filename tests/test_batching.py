@@ -0,0 +1,88 @@
+import pytest
+from mock import patch
+
+from drf_client import api, batching, fields
+from drf_client.batching import batch_loads
+from drf_client.resources import Resource
+from .fixtures import clear_cache
+from .helpers import mock_response
+
+pytestmark = pytest.mark.usefixtures("clear_cache")
+
+
+class ExampleResource(Resource):
+    _route = "foo"
+
+    name = fields.Field()
+
+
+class OtherResource(Resource):
+    _route = "bar"
+
+    name = fields.Field()
+
+
+def _list_response(*ids):
+    results = [{"id": pk, "name": "name {0}".format(pk)} for pk in ids]
+    return mock_response(json_value={"results": results})
+
+
+@pytest.fixture
+def request_mock():
+    with patch.object(api, "request") as request_mock:
+        yield request_mock
+
+
+def test_lazy_loads_in_scope_use_one_request(request_mock):
+    request_mock.return_value = _list_response(1, 2, 3)
+    with batch_loads():
+        resources = [ExampleResource(id=pk) for pk in (1, 2, 3)]
+        names = [resource.name for resource in resources]
+
+    assert names == ["name 1", "name 2", "name 3"]
+    assert request_mock.call_count == 1
+    assert request_mock.call_args[1]['params']['id__in'] == "1,2,3"
+
+
+def test_only_the_class_accessed_is_loaded(request_mock):
+    request_mock.return_value = _list_response(1)
+    with batch_loads() as batch:
+        example = ExampleResource(id=1)
+        OtherResource(id=1)
+        example.name
+        assert len(batch) == 1
+
+
+def test_flush_loads_everything_collected(request_mock):
+    request_mock.side_effect = [_list_response(1), _list_response(2)]
+    with batch_loads() as batch:
+        example = ExampleResource(id=1)
+        other = OtherResource(id=2)
+        batch.flush()
+        assert request_mock.call_count == 2
+        assert example.raw_data and other.raw_data
+        assert len(batch) == 0
+
+
+def test_resources_with_data_are_not_collected():
+    with batch_loads() as batch:
+        ExampleResource(data={"id": 1})
+        ExampleResource()
+        assert len(batch) == 0
+
+
+def test_resources_outside_scope_are_not_collected():
+    with batch_loads() as batch:
+        pass
+    ExampleResource(id=1)
+    assert len(batch) == 0
+    assert batching.get_current_batch() is None
+
+
+def test_missing_resource_falls_back_to_its_own_request(request_mock):
+    request_mock.return_value = _list_response()
+    with batch_loads():
+        resource = ExampleResource(id=1)
+        with patch.object(ExampleResource, "_fetch_data") as fetch_mock:
+            fetch_mock.return_value = {"id": 1, "name": "single"}
+            assert resource.name == "single"
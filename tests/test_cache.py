@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from drf_client.cache import ResourceCache, sizeof
+
+
+class Foo(object):
+    pass
+
+
+def test_get_returns_none_when_missing():
+    assert ResourceCache().get(Foo, 1) is None
+
+
+def test_set_then_get_returns_entry():
+    cache = ResourceCache()
+    now = datetime.now()
+    data = {"id": 1}
+    cache.set(Foo, 1, data, now)
+    entry = cache.get(Foo, 1)
+    assert entry.data is data
+    assert entry.loaded == now
+
+
+def test_entries_are_keyed_by_class():
+    cache = ResourceCache()
+    cache.set(Foo, 1, {"id": 1}, datetime.now())
+    assert cache.get(object, 1) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResourceCache(max_entries=2)
+    now = datetime.now()
+    cache.set(Foo, 1, {"id": 1}, now)
+    cache.set(Foo, 2, {"id": 2}, now)
+    cache.get(Foo, 1)
+    cache.set(Foo, 3, {"id": 3}, now)
+    assert cache.get(Foo, 2) is None
+    assert cache.get(Foo, 1) is not None
+    assert len(cache) == 2
+
+
+def test_memory_cap_evicts_entries():
+    data = {"id": 1, "name": "x" * 100}
+    cache = ResourceCache(max_bytes=sizeof(data) * 2)
+    for pk in range(5):
+        cache.set(Foo, pk, dict(data, id=pk), datetime.now())
+    assert len(cache) == 2
+    assert cache.size <= cache.max_bytes
+
+
+def test_zero_entries_disables_cache():
+    cache = ResourceCache(max_entries=0)
+    cache.set(Foo, 1, {"id": 1}, datetime.now())
+    assert cache.get(Foo, 1) is None
+
+
+def test_discard_and_clear():
+    cache = ResourceCache()
+    cache.set(Foo, 1, {"id": 1}, datetime.now())
+    cache.set(Foo, 2, {"id": 2}, datetime.now())
+    cache.discard(Foo, 1)
+    assert cache.get(Foo, 1) is None
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+from mock import patch
+
+from drf_client import auth, settings, client as client_module
+from drf_client.auth import TokenAuthentication
+from drf_client.client import Client, get_default_client
+from drf_client.resources import Resource
+from drf_client import fields
+from .helpers import mock_response
+
+
+class ExampleResource(Resource):
+    _route = "foo"
+
+    name = fields.Field()
+
+
+@pytest.fixture
+def default_client():
+    client_module.reset_default_client()
+    yield get_default_client()
+    client_module.reset_default_client()
+
+
+def test_settings_fall_back_to_module_settings():
+    client = Client()
+    assert client.get_setting("MAX_PAGINATION") == settings.MAX_PAGINATION
+    assert client.api_url == settings.API_URL
+
+
+def test_settings_can_be_overridden_per_client():
+    client = Client(max_pagination=10, verify_ssl=False)
+    assert client.max_pagination == 10
+    assert client.verify_ssl is False
+
+
+def test_api_url_built_from_host():
+    client = Client(host="example.com", use_https=True)
+    assert client.api_url == "https://example.com"
+
+
+def test_authentication_is_scoped_to_client():
+    first, second = Client(), Client()
+    first.set_token("abc")
+    assert isinstance(first.authentication, TokenAuthentication)
+    assert second.authentication is settings.AUTHENTICATION
+
+
+def test_default_client_follows_module_authentication(default_client):
+    auth.set_token("abcdef")
+    assert default_client.authentication is settings.AUTHENTICATION
+
+
+def test_each_client_has_its_own_transport():
+    assert Client().transport is not Client().transport
+
+
+def test_transport_uses_client_pool_settings():
+    client = Client(pool_maxsize=42)
+    assert client.transport.pool_maxsize == 42
+
+
+def test_reset_default_client_creates_new_client(default_client):
+    client_module.reset_default_client()
+    assert get_default_client() is not default_client
+
+
+def test_resource_urls_use_bound_client():
+    client = Client(host="example.com")
+    resource = ExampleResource(id=3, client=client)
+    assert resource.get_absolute_url() == "http://example.com/foo/3"
+
+
+@patch("requests.Session.get")
+def test_get_binds_resources_to_client(get_mock):
+    client = Client(host="example.com")
+    get_mock.return_value = mock_response(json_value={"results": [{"id": 1}]})
+    resources = client.get(ExampleResource)
+    assert resources[0].get_client() is client
+    assert get_mock.call_args[0][0] == "http://example.com/foo"
+
+
+@patch("requests.Session.get")
+def test_fetch_data_uses_bound_client(get_mock):
+    client = Client(host="example.com")
+    get_mock.return_value = mock_response(json_value={"id": 3, "name": "bar"})
+    resource = ExampleResource(id=3, client=client)
+    assert resource.name == "bar"
+    assert get_mock.call_args[0][0] == "http://example.com/foo/3"
+
+
+def test_run_once_drops_calls_while_one_is_running():
+    client = Client()
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(1)
+        return "done"
+
+    first = client.run_once("key", work)
+    started.wait(1)
+    assert client.run_once("key", work) is None
+    release.set()
+    assert first.get(timeout=1) == "done"
+    assert client.run_once("key", lambda: "again").get(timeout=1) == "again"
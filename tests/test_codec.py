@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from mock import Mock, patch
+
+from drf_client import api, codec
+from drf_client.client import Client
+from drf_client.codec import JSONCodec, get_codec
+from drf_client.utils import ResponseParser
+from .helpers import mock_response
+
+
+def test_auto_picks_fastest_installed_backend():
+    assert get_codec("auto").name == codec.available_backends()[0]
+
+
+def test_standard_library_is_always_available():
+    assert "json" in codec.available_backends()
+    assert get_codec("json").loads is json.loads
+
+
+@pytest.mark.parametrize("name", codec.available_backends())
+def test_floats_survive_a_round_trip(name):
+    data = {"values": [0.1, 1 / 3.0, 2 ** 0.5, 1e-300, 123456789.12345679]}
+    backend = get_codec(name)
+    assert backend.decode(backend.encode(data)) == data
+
+
+def test_ujson_floats_are_decoded_precisely():
+    ujson = Mock(spec=["dumps", "loads"])
+    with patch.dict("sys.modules", ujson=ujson):
+        backend = codec.load_backend("ujson")
+    backend.decode("[0.1]")
+    ujson.loads.assert_called_with("[0.1]", precise_float=True)
+    assert backend.encode([0.1]) == "[0.1]"
+    assert not ujson.dumps.called
+
+
+def test_unknown_backend_raises_value_error():
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def test_codec_instances_are_used_as_they_are():
+    custom = JSONCodec(json.dumps, json.loads)
+    assert get_codec(custom) is custom
+
+
+def test_parser_decodes_content_with_codec():
+    custom = JSONCodec(json.dumps, lambda content: {"results": [{"id": 7}]})
+    parser = ResponseParser(codec=custom)
+    assert parser.parse(mock_response(json_value={})) == [{"id": 7}]
+
+
+def test_parser_without_codec_uses_response_json():
+    response = mock_response(json_value={"results": [{"id": 1}]})
+    response.content = None
+    assert ResponseParser().parse(response) == [{"id": 1}]
+
+
+@patch("requests.Session.post")
+def test_client_encodes_request_data_with_its_codec(post_mock):
+    custom = JSONCodec(lambda data: "encoded", json.loads)
+    client = Client(json_codec=custom)
+    api.request("post", "foo", data={"id": 1}, client=client)
+    assert post_mock.call_args[1]['data'] == "encoded"
+    assert client.response_parser.codec is custom
@@ -1,4 +1,4 @@
-from drf_client.exceptions import APIException
+from drf_client.exceptions import APIException, BulkOperationError
 from .helpers import mock_response
 
 
@@ -15,3 +15,10 @@ def test_exception_does_not_print_body_if_no_text():
     resp = mock_response(text="")
     error = APIException("", response=resp)
     assert "Response" not in str(error)
+
+
+def test_bulk_error_summarizes_failures():
+    resp = mock_response(text="")
+    errors = [(1, APIException("first", resp)), (2, APIException("second", resp))]
+    error = BulkOperationError("Failed to delete", errors)
+    assert str(error) == "Failed to delete: 2 failed. First error: first"
@@ -2,6 +2,7 @@ import pytest
 from mock import patch, Mock
 from drf_client import fields
 from datetime import datetime
+from dateutil import parser
 from dateutil.tz import tzutc
 from .helpers import RFC3339_TIME
 
@@ -99,3 +100,33 @@ def test_required_flag_set_on_init():
 def test_required_flag_set_manually_on_init():
     field = fields.Field(required=True)
     assert field.required is True
+
+
+@pytest.mark.parametrize("value", [
+    RFC3339_TIME,
+    "2015-01-17T01:53:36.123Z",
+    "2015-01-17T01:53:36.123456789+02:00",
+    "2015-01-17T01:53:36-0530",
+    "2015-01-17T01:53:36+00:00",
+    "2015-01-17 01:53:36",
+])
+def test_fast_rfc3339_parsing_matches_dateutil(value):
+    parsed = fields.parse_rfc3339(value)
+    assert parsed is not None
+    assert parsed == parser.parse(value)
+    assert parsed.utcoffset() == parser.parse(value).utcoffset()
+
+
+def test_unusual_formats_fall_back_to_dateutil():
+    assert fields.parse_rfc3339("Jan 17 2015") is None
+    assert fields.DateTimeField.to_datetime("Jan 17 2015") == datetime(2015, 1, 17)
+
+
+def test_to_datetimes_converts_a_column():
+    dates = [RFC3339_TIME, None, RFC3339_TIME]
+    with patch.object(fields.DateTimeField, "to_datetime",
+                      wraps=fields.DateTimeField.to_datetime) as to_datetime_mock:
+        converted = fields.DateTimeField.to_datetimes(dates)
+    assert converted[0] is converted[2]
+    assert converted[1] is None
+    assert to_datetime_mock.call_count == 2
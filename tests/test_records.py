@@ -0,0 +1,65 @@
+import pickle
+from collections import Mapping
+
+import pytest
+from mock import patch
+
+from drf_client import records
+from drf_client.cache import sizeof
+from drf_client.records import Record, compact
+
+
+@pytest.fixture
+def record():
+    return compact({u"id": 1, u"name": u"foo", u"owner": {u"id": 2}})
+
+
+def test_record_behaves_like_a_mapping(record):
+    assert isinstance(record, Mapping)
+    assert record["name"] == "foo"
+    assert record.get("missing") is None
+    assert "id" in record and "missing" not in record
+    assert sorted(record.keys()) == ["id", "name", "owner"]
+    assert len(record) == 3
+
+
+def test_record_equals_dict_with_same_contents(record):
+    expected = {"id": 1, "name": "foo", "owner": {"id": 2}}
+    assert record == expected
+    assert expected == record
+    assert record != {"id": 1}
+
+
+def test_nested_dicts_and_lists_are_compacted():
+    data = compact({u"children": [{u"id": 1}, {u"id": 2}]})
+    assert all(isinstance(child, Record) for child in data["children"])
+
+
+def test_records_with_same_keys_share_a_schema():
+    first, second = compact({u"id": 1}), compact({u"id": 2})
+    assert first._schema is second._schema
+    assert type(first._schema.keys[0]) is str
+
+
+@pytest.mark.parametrize("protocol", [0, pickle.HIGHEST_PROTOCOL])
+def test_records_can_be_pickled(record, protocol):
+    copy = pickle.loads(pickle.dumps(record, protocol))
+    assert copy == record
+    assert copy._schema is record._schema
+
+
+def test_ascii_text_becomes_native_strings():
+    data = compact({u"ascii": u"foo", u"text": u"caf\xe9"})
+    assert type(data["ascii"]) is str
+    assert data["text"] == u"caf\xe9"
+
+
+def test_record_is_smaller_than_a_dict(record):
+    assert not hasattr(record, "__dict__")
+    assert sizeof(record) < sizeof(record.to_dict())
+
+
+def test_too_many_schemas_fall_back_to_dicts():
+    with patch.object(records, "MAX_SCHEMAS", 0):
+        data = compact({u"never seen before": 1})
+    assert type(data) is dict
@@ -1,12 +1,18 @@
+import gc
+import pickle
+import threading
+import time
+
 import pytest
 from mock import patch
 from datetime import timedelta
 
 from drf_client.resources import Resource
 from drf_client.exceptions import APIException
-from drf_client import fields, settings, resources
+from drf_client.records import Record
+from drf_client import api, fields, settings, resources
 from .helpers import mock_response
-from .fixtures import authenticate
+from .fixtures import authenticate, clear_cache
 
 
 class ExampleResource(Resource):
@@ -63,6 +69,19 @@ def test_setting_raw_data_updates_data_store(resource):
     assert resource._data_store == example_dict
 
 
+def test_setting_raw_data_keeps_payload_as_decoded(resource):
+    example_dict = {u"basic": [{u"nested": u"caf\xe9"}]}
+    resource.raw_data = example_dict
+    assert resource.raw_data is example_dict
+
+
+def test_field_values_are_converted_when_read(resource):
+    resource.raw_data = {u"basic": {u"nested": u"caf\xe9"}}
+    value = resource.basic
+    assert value == {"nested": "caf\xc3\xa9"}
+    assert isinstance(value.keys()[0], str)
+
+
 def test_id_can_pull_from_data_store_if_not_assigned_directly(resource):
     resource.raw_data = {"id": 10}
     assert resource.id == 10
@@ -92,7 +111,7 @@ def test_get_absolute_url_includes_id(resource):
         assert url == "resource/10"
 
 
-@patch("requests.delete")
+@patch("requests.Session.delete")
 def test_delete_calls_api(delete_mock, resource, authenticate):
     delete_mock.return_value = mock_response(ok=True)
     resource.delete()
@@ -101,7 +120,7 @@ def test_delete_calls_api(delete_mock, resource, authenticate):
     assert url == resource.get_absolute_url()
 
 
-@patch("requests.delete")
+@patch("requests.Session.delete")
 def test_delete_raises_request_exception_on_error(delete_mock, resource, authenticate):
     delete_mock.return_value = mock_response(ok=False)
     with pytest.raises(APIException) as err:
@@ -110,6 +129,154 @@ def test_delete_raises_request_exception_on_error(delete_mock, resource, authent
     assert "Could not delete" in str(err)
 
 
+@patch("requests.Session.delete")
+def test_delete_async_calls_api(delete_mock, resource, authenticate):
+    delete_mock.return_value = mock_response(ok=True)
+    resource.delete_async().get(timeout=1)
+    assert delete_mock.called
+
+
+def test_reload_async_updates_data(id_resource):
+    with patch.object(ExampleResource, "_fetch_data") as fetch_mock:
+        fetch_mock.return_value = {"id": 1, "basic": "foo"}
+        id_resource.reload_async().get(timeout=1)
+    assert id_resource.raw_data["basic"] == "foo"
+
+
+@patch.object(api, "request")
+def test_fetch_many_fills_instances_with_one_request(request_mock):
+    results = [{"id": 1, "basic": "one"}, {"id": 2, "basic": "two"}]
+    request_mock.return_value = mock_response(json_value={"results": results})
+    existing = ExampleResource(id=2)
+    resources = ExampleResource.fetch_many([1, existing, 3])
+    assert request_mock.call_count == 1
+    assert resources[1] is existing
+    assert [resource.raw_data for resource in resources[:2]] == results
+    assert resources[2].raw_data is None
+
+
+def test_instances_share_loaded_data(clear_cache):
+    with patch.object(ExampleResource, "_fetch_data") as fetch_mock:
+        fetch_mock.return_value = {"id": 5, "basic": "foo"}
+        first, second = ExampleResource(id=5), ExampleResource(id=5)
+        assert first.basic == "foo"
+        assert second.basic == "foo"
+    assert fetch_mock.call_count == 1
+    assert second.raw_data is first.raw_data
+
+
+@patch.object(api, "request")
+def test_live_instances_pick_up_newer_data(request_mock, clear_cache):
+    first = ExampleResource(data={"id": 7, "basic": "old"})
+    second = ExampleResource(id=7)
+    assert second.basic == "old"
+    # Loaded a moment ago, so the changes below are newer.
+    second._last_loaded -= timedelta(seconds=1)
+
+    with patch.object(ExampleResource, "_fetch_data",
+                      return_value={"id": 7, "basic": "reloaded"}):
+        first.reload()
+    assert second.basic == "reloaded"
+
+    second._last_loaded -= timedelta(seconds=1)
+    request_mock.return_value = mock_response(
+        json_value={"id": 7, "basic": "saved"})
+    first.basic = "saved"
+    first.save()
+    assert second.basic == "saved"
+
+
+def test_parsed_resources_fill_shared_data(clear_cache):
+    ExampleResource(data={"id": 6, "basic": "bar"})
+    with patch.object(ExampleResource, "_fetch_data") as fetch_mock:
+        assert ExampleResource(id=6).basic == "bar"
+    assert not fetch_mock.called
+
+
+def test_nested_resources_do_not_share_data(clear_cache, parent_resource):
+    parent_resource.load_data()
+    assert SimpleResource(id=2)._load_shared_data() is False
+
+
+class RevalidatedResource(Resource):
+    DATA_EXPIRATION = timedelta(0)
+    MAX_STALENESS = timedelta(hours=1)
+
+    basic = fields.Field()
+
+
+def test_stale_data_returned_while_refreshing_in_background(clear_cache):
+    refreshed = threading.Event()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(1)
+        refreshed.set()
+        return {"id": 1, "basic": "new"}
+
+    resource = RevalidatedResource(data={"id": 1, "basic": "old"})
+    with patch.object(RevalidatedResource, "_fetch_data", side_effect=fetch) as fetch_mock:
+        assert resource.basic == "old"
+        assert resource.basic == "old"
+        release.set()
+        refreshed.wait(1)
+        time.sleep(0.05)
+        assert resource.raw_data["basic"] == "new"
+    # Both reads happened during the same refresh, which only ran once.
+    assert fetch_mock.call_count == 1
+
+
+def test_data_past_max_staleness_blocks_on_reload(clear_cache):
+    resource = RevalidatedResource(data={"id": 2, "basic": "old"})
+    resource._last_loaded -= timedelta(hours=2)
+    with patch.object(RevalidatedResource, "_fetch_data") as fetch_mock:
+        fetch_mock.return_value = {"id": 2, "basic": "new"}
+        assert resource.basic == "new"
+
+
+def _detail_response(data, status_code=200, headers=None):
+    response = mock_response(json_value=data, headers=headers or {})
+    response.status_code = status_code
+    return response
+
+
+@patch("requests.Session.get")
+def test_reload_sends_conditional_headers(get_mock, clear_cache):
+    validators = {"ETag": '"abc"', "Last-Modified": "Sat, 17 Jan 2015 01:53:36 GMT"}
+    get_mock.return_value = _detail_response({"id": 1, "basic": "foo"},
+                                             headers=validators)
+    resource = ExampleResource(id=1)
+    resource.reload()
+    resource.reload()
+    headers = get_mock.call_args[1]["headers"]
+    assert headers["If-None-Match"] == '"abc"'
+    assert headers["If-Modified-Since"] == validators["Last-Modified"]
+
+
+@patch("requests.Session.get")
+def test_first_load_is_not_conditional(get_mock, clear_cache):
+    get_mock.return_value = _detail_response({"id": 1}, headers={"ETag": "x"})
+    ExampleResource(id=1).reload()
+    assert "If-None-Match" not in get_mock.call_args[1]["headers"]
+
+
+@patch("requests.Session.get")
+def test_not_modified_keeps_data_and_resets_load_time(get_mock, clear_cache):
+    get_mock.return_value = _detail_response({"id": 1, "basic": "foo"},
+                                             headers={"ETag": "x"})
+    resource = ExampleResource(id=1)
+    resource.reload()
+    data = resource.raw_data
+    resource._last_loaded -= timedelta(hours=1)
+
+    not_modified = _detail_response(None, status_code=304)
+    get_mock.return_value = not_modified
+    resource.reload()
+    assert resource.raw_data is data
+    assert not resource._is_data_stale()
+    assert not not_modified.json.called
+
+
 def test_can_set_raw_data_on_initialization():
     data = {"id": 20, "name": "foo"}
     resource = Resource(data=data)
@@ -276,3 +443,246 @@ def test_reload_detached_many_resource_errors_if_no_data_for_its_id(parent_resou
     with pytest.raises(LookupError) as e:
         first_child.name
     assert 'Did not find data for {}'.format(str(first_child)) in str(e)
+
+
+def test_many_resource_index_is_reused_until_parent_reloads(parent_resource):
+    parent_resource.load_data()
+    children = parent_resource.children
+    list_field = ParentResource._declared_fields['children']
+    assert children[1].name == 'Ken'
+    data_set, index = list_field._indexes[parent_resource]
+    assert children[0].name == 'Jason'
+    assert list_field._indexes[parent_resource][1] is index
+
+    parent_resource.reload_data()
+    assert children[0].name == 'Jenny'
+    assert list_field._indexes[parent_resource][1] is not index
+
+
+def test_many_resource_errors_once_parent_is_gone():
+    parent = ParentResource(id=1)
+    parent.load_data()
+    first_child = parent.children[0]
+    del parent
+    gc.collect()
+    with pytest.raises(LookupError) as e:
+        first_child.name
+    assert 'Unable to find associated parent' in str(e)
+
+
+def test_many_resource_creates_children_on_access(parent_resource):
+    parent_resource.load_data()
+    with patch.object(SimpleResource, '__init__', return_value=None) as init_mock:
+        children = parent_resource.children
+        assert len(children) == 2
+        assert not init_mock.called
+        children[0]
+        assert init_mock.call_count == 1
+
+
+def test_many_resource_supports_list_operations(parent_resource):
+    parent_resource.load_data()
+    children = parent_resource.children
+    assert [child.name for child in children] == ['Jason', 'Ken']
+    assert children[-1].id == 4
+    assert [child.id for child in children[:1]] == [3]
+    assert children == list(children)
+    with pytest.raises(IndexError):
+        children[2]
+
+
+def test_many_resource_children_cached_until_parent_reloads(parent_resource):
+    parent_resource.load_data()
+    first_child = parent_resource.children[0]
+    assert parent_resource.children[0] is first_child
+    parent_resource.reload_data()
+    assert parent_resource.children[0] is not first_child
+
+
+def test_setting_field_records_change_and_returns_it(id_resource):
+    id_resource.basic = "changed"
+    assert id_resource.basic == "changed"
+    assert id_resource._changes == {"basic": "changed"}
+
+
+@patch.object(api, "request")
+def test_save_patches_only_changed_fields(request_mock, clear_cache):
+    request_mock.return_value = mock_response(json_value={"id": 1, "basic": "new"})
+    resource = ExampleResource(data={"id": 1, "basic": "old", "other": "x"})
+    resource.basic = "new"
+    resource.save()
+    args, kwargs = request_mock.call_args
+    assert args == ("patch",)
+    assert kwargs["data"] == {"basic": "new"}
+    assert kwargs["url"] == resource.get_absolute_url()
+    assert resource.raw_data == {"id": 1, "basic": "new"}
+    assert resource._changes == {}
+
+
+@patch.object(api, "request")
+def test_save_without_changes_does_nothing(request_mock, id_resource):
+    id_resource.save()
+    assert not request_mock.called
+
+
+@patch.object(api, "request")
+def test_save_sends_ids_of_nested_resources(request_mock, parent_resource):
+    parent_resource.load_data()
+    request_mock.return_value = mock_response(json_value=parent_resource_data())
+    parent_resource.brother = SimpleResource(id=8)
+    parent_resource.children = [SimpleResource(id=9)]
+    parent_resource.save()
+    assert request_mock.call_args[1]["data"] == {"brother": 8, "children": [9]}
+
+
+@patch.object(api, "request")
+def test_save_applies_changes_when_no_content_returned(request_mock, clear_cache):
+    response = mock_response()
+    response.status_code = 204
+    request_mock.return_value = response
+    resource = ExampleResource(data={"id": 1, "basic": "old"})
+    resource.basic = "new"
+    resource.save()
+    assert resource.raw_data == {"id": 1, "basic": "new"}
+
+
+@patch.object(api, "request")
+def test_save_many_field_assigned_from_another_resource(
+        request_mock, parent_resource, clear_cache):
+    parent_resource.load_data()
+    other = ParentResource(id=2)
+    other._load(dict(parent_resource_reload_data(), id=2))
+    response = mock_response()
+    response.status_code = 204
+    request_mock.return_value = response
+    other.children = parent_resource.children
+    other.save()
+    assert request_mock.call_args[1]["data"] == {"children": [3, 4]}
+    assert [child.name for child in other.children] == ['Jason', 'Ken']
+
+
+@patch.object(api, "request")
+def test_save_merges_nested_resources_when_no_content_returned(
+        request_mock, parent_resource, clear_cache):
+    parent_resource.load_data()
+    response = mock_response()
+    response.status_code = 204
+    request_mock.return_value = response
+    parent_resource.brother = SimpleResource(data=simple_resource(8, 'Al'))
+    parent_resource.children = [SimpleResource(data=simple_resource(9, 'Jo'))]
+    parent_resource.save()
+    assert parent_resource.raw_data['brother'] == simple_resource(8, 'Al')
+    assert parent_resource.brother.name == 'Al'
+    assert [child.name for child in parent_resource.children] == ['Jo']
+
+
+@patch.object(api, "request")
+def test_save_reloads_unloaded_nested_resources_when_no_content_returned(
+        request_mock, parent_resource, clear_cache):
+    parent_resource.load_data()
+    response = mock_response()
+    response.status_code = 204
+    request_mock.return_value = response
+    parent_resource.brother = SimpleResource(id=5)
+    with patch.object(ParentResource, '_fetch_data',
+                      return_value=parent_resource_reload_data()):
+        parent_resource.save()
+    assert parent_resource.sister.name == 'Jane'
+    assert not parent_resource._changes
+
+
+@patch.object(api, "request")
+def test_save_keeps_changes_on_error(request_mock, id_resource):
+    request_mock.return_value = mock_response(ok=False)
+    id_resource.basic = "new"
+    with pytest.raises(APIException):
+        id_resource.save()
+    assert id_resource._changes == {"basic": "new"}
+
+
+def test_field_values_are_memoized(clear_cache):
+    resource = ExampleResource(data={"id": 1, "basic": "value"})
+    with patch.object(fields.Field, "to_representation",
+                      return_value="value") as rep_mock:
+        assert resource.basic == resource.basic == "value"
+    assert rep_mock.call_count == 1
+
+
+def test_nested_resources_are_memoized_until_reload(parent_resource, clear_cache):
+    parent_resource.load_data()
+    brother = parent_resource.brother
+    assert parent_resource.brother is brother
+    assert parent_resource.children is parent_resource.children
+
+    parent_resource.reload_data()
+    assert parent_resource.brother is not brother
+    assert parent_resource.brother.name == 'Marley'
+
+
+def test_assigning_the_same_data_keeps_memoized_values(clear_cache):
+    data = {"id": 1, "basic": "value"}
+    resource = ExampleResource(data=data)
+    version = resource._data_version
+    resource.raw_data = data
+    assert resource._data_version == version
+
+
+def test_setting_a_field_invalidates_its_memoized_value(clear_cache):
+    resource = ExampleResource(data={"id": 1, "basic": "old"})
+    assert resource.basic == "old"
+    resource.basic = "new"
+    assert resource.basic == "new"
+    assert "basic" not in resource._values
+
+
+def test_stale_data_is_reloaded_before_memoized_value_is_used(clear_cache):
+    resource = ExampleResource(data={"id": 1, "basic": "old"})
+    assert resource.basic == "old"
+    resource._last_loaded -= ExampleResource.DATA_EXPIRATION * 2
+    resource.get_client().cache.clear()
+    with patch.object(ExampleResource, "_fetch_data",
+                      return_value={"id": 1, "basic": "new"}):
+        assert resource.basic == "new"
+
+
+def test_value_computed_while_data_is_replaced_is_not_memoized(clear_cache):
+    resource = ExampleResource(data={"id": 1, "basic": "old"})
+
+    def replace_data(instance):
+        instance._replace_data({"id": 1, "basic": "new"})
+        return "old"
+
+    with patch.object(fields.Field, "to_representation",
+                      side_effect=replace_data):
+        assert resource.basic == "old"
+    assert resource.basic == "new"
+
+
+class CompactResource(ParentResource):
+    COMPACT = True
+
+
+def test_resources_do_not_allocate_instance_dicts():
+    assert not hasattr(Resource(id=1), "__dict__")
+
+
+def test_compact_resources_keep_the_same_fields(clear_cache):
+    resource = CompactResource(data=parent_resource_data())
+    assert isinstance(resource.raw_data, Record)
+    assert resource.name == 'Mother'
+    assert resource.brother.name == 'Bob'
+    assert [child.name for child in resource.children] == ['Jason', 'Ken']
+    assert resource.raw_data == parent_resource_data()
+
+
+@pytest.mark.parametrize("protocol", [0, pickle.HIGHEST_PROTOCOL])
+@pytest.mark.parametrize("cls", [ParentResource, CompactResource])
+def test_resources_can_be_pickled(cls, protocol, clear_cache):
+    resource = cls(data=parent_resource_data())
+    resource.name = 'Changed'
+    assert resource.brother.name == 'Bob'
+    copy = pickle.loads(pickle.dumps(resource, protocol))
+    assert copy.raw_data == parent_resource_data()
+    assert copy.name == 'Changed'
+    assert copy.brother.name == 'Bob'
+    assert [child.name for child in copy.children] == ['Jason', 'Ken']
@@ -0,0 +1,138 @@
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+from mock import Mock, patch
+
+from drf_client import api
+from drf_client.client import Client
+from drf_client.retry import RetryPolicy, get_retry_after
+from drf_client.throttle import Governor
+from drf_client.transport import Transport
+from .helpers import FakeClock, mock_response
+
+
+def _response(status_code, headers=None):
+    response = mock_response(ok=status_code < 400, headers=headers or {})
+    response.status_code = status_code
+    return response
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def sleep(clock):
+    return Mock(side_effect=clock.sleep)
+
+
+@pytest.fixture
+def transport(clock, sleep):
+    policy = RetryPolicy(max_attempts=3, backoff=1, max_backoff=10,
+                         jitter=False, sleep=sleep)
+    return Transport(retry=policy, governor=Governor(clock=clock, sleep=sleep))
+
+
+def test_idempotent_methods_are_retried_by_default():
+    policy = RetryPolicy(max_attempts=3, retry_post=False)
+    assert policy.applies_to("get") and policy.applies_to("DELETE")
+    assert not policy.applies_to("post")
+    assert policy.applies_to("post", retry=True)
+    assert not policy.applies_to("get", retry=False)
+
+
+def test_single_attempt_disables_retrying():
+    assert not RetryPolicy(max_attempts=1).applies_to("get", retry=True)
+
+
+def test_backoff_doubles_up_to_the_maximum():
+    policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+    assert [policy.get_backoff(attempt) for attempt in (1, 2, 3, 4)] == [1, 2, 4, 5]
+
+
+def test_jitter_stays_within_the_backoff():
+    policy = RetryPolicy(backoff=1, max_backoff=5, jitter=True)
+    assert all(0 <= policy.get_backoff(3) <= 4 for _ in range(20))
+
+
+def test_retry_after_in_seconds_or_as_a_date():
+    assert get_retry_after(_response(503, {"Retry-After": "3"})) == 3
+    date = formatdate(time.time() + 60, usegmt=True)
+    assert 55 < get_retry_after(_response(503, {"Retry-After": date})) <= 60
+    assert get_retry_after(_response(503)) is None
+
+
+@patch("requests.Session.get")
+def test_transient_failures_are_retried(get_mock, transport, sleep):
+    get_mock.side_effect = [_response(503), _response(502), _response(200)]
+    response = transport.request("get", "foo")
+    assert response.status_code == 200
+    assert get_mock.call_count == 3
+    assert [args[0] for args, _ in sleep.call_args_list] == [1, 2]
+    assert transport.stats["retries"] == 2
+
+
+@patch("requests.Session.get")
+def test_last_response_returned_when_attempts_run_out(get_mock, transport):
+    get_mock.return_value = _response(503)
+    assert transport.request("get", "foo").status_code == 503
+    assert get_mock.call_count == 3
+    assert transport.stats["retries_exhausted"] == 1
+
+
+@patch("requests.Session.get")
+def test_retry_after_is_honoured(get_mock, transport, sleep):
+    get_mock.side_effect = [_response(429, {"Retry-After": "7"}), _response(200)]
+    transport.request("get", "foo")
+    sleep.assert_called_once_with(7)
+
+
+@patch("requests.Session.get")
+def test_long_retry_after_is_not_waited_for(get_mock, transport, sleep):
+    get_mock.return_value = _response(429, {"Retry-After": "3600"})
+    assert transport.request("get", "foo").status_code == 429
+    assert not sleep.called
+
+
+@patch("requests.Session.get")
+def test_connection_errors_are_retried(get_mock, transport):
+    get_mock.side_effect = [requests.ConnectionError(), _response(200)]
+    assert transport.request("get", "foo").status_code == 200
+
+
+@patch("requests.Session.get")
+def test_connection_error_raised_when_attempts_run_out(get_mock, transport):
+    get_mock.side_effect = requests.ConnectionError()
+    with pytest.raises(requests.ConnectionError):
+        transport.request("get", "foo")
+    assert get_mock.call_count == 3
+
+
+@patch("requests.Session.post")
+def test_post_is_only_retried_when_asked(post_mock, sleep):
+    client = Client(retry_max_attempts=2, retry_jitter=False)
+    client.transport.retry.sleep = sleep
+    post_mock.return_value = _response(503)
+    api.request("post", "foo", data={}, client=client)
+    assert post_mock.call_count == 1
+    api.request("post", "foo", data={}, client=client, retry=True)
+    assert post_mock.call_count == 3
+    assert client.stats.snapshot() == {"retries": 1, "retries_exhausted": 1}
+
+
+@patch("requests.Session.get")
+def test_read_timeouts_are_retried_for_idempotent_methods(get_mock, transport):
+    get_mock.side_effect = [requests.ReadTimeout(), _response(200)]
+    assert transport.request("get", "foo").status_code == 200
+
+
+@patch("requests.Session.post")
+def test_read_timeouts_are_not_retried_for_post(post_mock, transport):
+    post_mock.side_effect = [requests.ConnectTimeout(), requests.ReadTimeout(),
+                             _response(200)]
+    with pytest.raises(requests.ReadTimeout):
+        transport.request("post", "foo", retry=True)
+    assert post_mock.call_count == 2
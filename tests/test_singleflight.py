@@ -0,0 +1,148 @@
+import threading
+
+import pytest
+from mock import patch
+
+from drf_client import api
+from drf_client.client import Client
+from drf_client.singleflight import SingleFlight
+from .helpers import mock_response
+
+
+def _run_concurrently(count, target):
+    """Call `target` from `count` threads, returning what each got."""
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as error:
+            results[index] = error
+
+    threads = [threading.Thread(target=run, args=(index,))
+               for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _wait_for_waiters(flight, count):
+    """Block until `count` calls are waiting on the one in flight."""
+    while flight.stats["requests_saved"] < count:
+        threading.Event().wait(0.001)
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        release.wait()
+        return "result"
+
+    threads, results = _run_concurrently(
+        4, lambda: flight.do("key", func))
+    _wait_for_waiters(flight, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert flight.stats["requests_saved"] == 3
+
+
+def test_waiters_get_the_error():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def func():
+        release.wait()
+        raise ValueError("boom")
+
+    threads, results = _run_concurrently(3, lambda: flight.do("key", func))
+    _wait_for_waiters(flight, 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_later_calls_are_made_again():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    with pytest.raises(ValueError):
+        flight.do("key", int, "nope")
+    assert flight.do("key", lambda: 3) == 3
+    assert flight.stats["requests_saved"] == 0
+
+
+@pytest.fixture
+def client():
+    client = Client(api_url="http://example.com", retry_max_attempts=1)
+    client.set_token("secret")
+    return client
+
+
+@patch("requests.Session.get")
+def test_identical_gets_are_sent_once(get_mock, client):
+    release = threading.Event()
+
+    def get(*args, **kwargs):
+        release.wait()
+        return mock_response(json={"id": 1})
+
+    get_mock.side_effect = get
+    threads, results = _run_concurrently(3, lambda: api.request(
+        "get", "http://example.com/foo/1/", params={"a": 1, "b": 2},
+        client=client))
+    _wait_for_waiters(client.single_flight, 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert get_mock.call_count == 1
+    assert all(result is results[0] for result in results)
+    assert client.stats["requests_saved"] == 2
+
+
+def test_key_covers_everything_sent(client):
+    release = threading.Event()
+    sent = []
+
+    def send(method, url, **kwargs):
+        sent.append(kwargs)
+        release.wait()
+        return mock_response()
+
+    requests = [
+        {"params": {"a": 1}},
+        {"params": {"a": 2}},
+        {"params": {"a": 1}, "headers": {"Authorization": "Token other"}},
+        {"params": {"a": 1}, "stream": True},
+        {"params": {"a": 1}, "timeout": 5},
+        {"params": {"a": 1}, "auth": ("user", "password")},
+    ]
+    with patch.object(client.transport, "request", side_effect=send):
+        threads = [threading.Thread(target=api.request, args=("get", "foo"),
+                                    kwargs=dict(client=client, **kwargs))
+                   for kwargs in requests]
+        for thread in threads:
+            thread.start()
+        while len(sent) < len(requests):
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+    assert client.stats["requests_saved"] == 0
+
+
+@patch("requests.Session.get")
+def test_can_be_turned_off(get_mock, client):
+    client.config["SINGLE_FLIGHT"] = False
+    get_mock.return_value = mock_response()
+    with patch.object(client.single_flight, "do") as do_mock:
+        api.request("get", "foo", client=client)
+    assert not do_mock.called
+    assert get_mock.call_count == 1
@@ -0,0 +1,62 @@
+# coding=utf-8
+import json
+import time
+
+import pytest
+
+from drf_client.streaming import StreamedPage
+from .helpers import iter_chunks
+
+BODY = json.dumps({
+    "count": 2,
+    "next": "http://example.com/foo?offset=2",
+    "results": [{"id": 1, "name": u"café", "score": 12345},
+                {"id": 2, "name": u"naïve", "score": 1.5}],
+}, ensure_ascii=False).encode("utf-8")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, len(BODY)])
+def test_results_decoded_from_any_chunking(chunk_size):
+    page = StreamedPage(iter_chunks(BODY, chunk_size))
+    assert list(page) == json.loads(BODY)["results"]
+    assert page.count == 2
+    assert page.has_next is True
+
+
+def test_results_are_decoded_one_at_a_time():
+    page = iter(StreamedPage(iter_chunks(BODY, 4)))
+    assert next(page)["id"] == 1
+
+
+def test_number_split_across_chunks():
+    page = StreamedPage(['{"results": [], "count": 12', '345}'])
+    assert list(page) == []
+    assert page.count == 12345
+
+
+def test_unpaginated_list():
+    page = StreamedPage(['[{"id": 1}, ', '{"id": 2}]'])
+    assert list(page) == [{"id": 1}, {"id": 2}]
+    assert page.found_results
+    assert page.has_next is None
+
+
+def test_truncated_body_raises_value_error():
+    with pytest.raises(ValueError):
+        list(StreamedPage(['{"results": [{"id": 1}']))
+
+
+def test_wide_record_is_decoded_in_linear_time():
+    record = {"id": 1, "values": [{"key": "x" * 50, "n": n}
+                                  for n in range(40000)]}
+    body = json.dumps({"results": [record]})
+    assert len(body) > 2 * 1024 * 1024
+
+    start = time.time()
+    json.loads(body)
+    baseline = time.time() - start
+
+    start = time.time()
+    assert list(StreamedPage(iter_chunks(body, 64 * 1024))) == [record]
+    # Retrying the decode on every chunk took over a hundred times longer.
+    assert time.time() - start < 10 * baseline + 0.5
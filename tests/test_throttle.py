@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+from mock import Mock, patch
+
+from drf_client.client import Client
+from drf_client.throttle import Governor, HostLimiter, TokenBucket
+from .helpers import FakeClock, mock_response
+
+
+def _response(status_code=200, headers=None):
+    response = mock_response(headers=headers or {})
+    response.status_code = status_code
+    return response
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2, burst=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == 0.5
+    assert bucket.acquire() == 0.5
+
+
+def test_unlimited_bucket_never_waits(clock):
+    bucket = TokenBucket(clock=clock, sleep=clock.sleep)
+    assert sum(bucket.acquire() for _ in range(100)) == 0
+
+
+def test_pause_holds_requests_back(clock):
+    bucket = TokenBucket(clock=clock, sleep=clock.sleep)
+    bucket.pause(5)
+    assert bucket.acquire() == 5
+
+
+def test_throttled_response_pauses_and_halves_rate(clock):
+    limiter = HostLimiter(rate=10, clock=clock, sleep=clock.sleep)
+    assert limiter.observe(_response(429, {"Retry-After": "3"}))
+    assert limiter.bucket.rate == 5
+    with limiter:
+        pass
+    assert clock.now == 1003
+
+
+def test_rate_recovers_after_throttling(clock):
+    limiter = HostLimiter(rate=10, clock=clock, sleep=clock.sleep)
+    limiter.observe(_response(429))
+    for _ in range(50):
+        limiter.observe(_response())
+    assert limiter.bucket.rate == 10
+
+
+def test_rate_limit_headers_pause_once_no_requests_remain():
+    clock = FakeClock(now=1.5e9)
+    limiter = HostLimiter(clock=clock, sleep=clock.sleep)
+    limiter.observe(_response(headers={"RateLimit-Remaining": "0",
+                                       "RateLimit-Reset": str(clock.now + 30)}))
+    with limiter:
+        pass
+    assert clock.now == 1.5e9 + 30
+
+
+def test_rate_limit_headers_do_not_slow_down_unlimited_hosts(clock):
+    limiter = HostLimiter(clock=clock, sleep=clock.sleep)
+    limiter.observe(_response(headers={"X-RateLimit-Remaining": "1000",
+                                       "X-RateLimit-Reset": "3600"}))
+    assert limiter.bucket.rate is None
+    for _ in range(20):
+        with limiter:
+            pass
+    assert clock.now == 1000.0
+
+
+def test_rate_limit_headers_keep_the_configured_rate(clock):
+    limiter = HostLimiter(rate=10, clock=clock, sleep=clock.sleep)
+    limiter.observe(_response(headers={"X-RateLimit-Remaining": "1000",
+                                       "X-RateLimit-Reset": "3600"}))
+    assert limiter.bucket.rate == 10
+
+
+def test_in_flight_requests_are_limited():
+    limiter = HostLimiter(max_in_flight=2)
+    in_flight, peak = [0], [0]
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def send():
+        with limiter:
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            release.wait(0.05)
+            with lock:
+                in_flight[0] -= 1
+
+    threads = [threading.Thread(target=send) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+
+def test_limits_are_per_host():
+    governor = Governor(rate=10, hosts={"slow.example.com": {"rate": 1}})
+    slow = governor.get_limiter("http://slow.example.com/foo")
+    assert slow is governor.get_limiter("http://slow.example.com/bar")
+    assert slow.max_rate == 1
+    assert governor.get_limiter("http://example.com/foo").max_rate == 10
+
+
+@patch("requests.Session.get")
+def test_client_counts_throttled_responses(get_mock):
+    client = Client(retry_max_attempts=1, host_limits={}, rate_limit=None)
+    get_mock.return_value = _response(429, {"Retry-After": "0"})
+    client.request("get", "http://example.com/foo")
+    assert client.stats["throttled"] == 1
@@ -0,0 +1,94 @@
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from mock import patch
+
+from drf_client import settings
+from drf_client.transport import Transport
+
+
+def test_transport_defaults_come_from_settings():
+    pooled = Transport()
+    assert pooled.pool_connections == settings.POOL_CONNECTIONS
+    assert pooled.pool_maxsize == settings.POOL_MAXSIZE
+    assert pooled.keep_alive == settings.KEEP_ALIVE
+
+
+def test_session_is_reused_between_requests():
+    pooled = Transport()
+    assert pooled.session is pooled.session
+
+
+def test_adapter_uses_configured_pool_size():
+    pooled = Transport(pool_connections=3, pool_maxsize=7)
+    adapter = pooled.session.get_adapter("https://example.com")
+    assert adapter._pool_connections == 3
+    assert adapter._pool_maxsize == 7
+
+
+def test_disabling_keep_alive_closes_connections():
+    pooled = Transport(keep_alive=False)
+    assert pooled.session.headers["Connection"] == "close"
+
+
+def test_session_is_created_once_by_concurrent_requests():
+    pooled = Transport()
+    create = pooled._create_session
+
+    def create_slowly():
+        time.sleep(0.01)
+        return create()
+
+    with patch.object(pooled, "_create_session",
+                      side_effect=create_slowly) as create_mock:
+        threads = [threading.Thread(target=lambda: pooled.session)
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert create_mock.call_count == 1
+
+
+@patch("requests.Session.get")
+def test_request_uses_session_method(get_mock):
+    Transport().request("GET", "foo", params={"a": 1})
+    get_mock.assert_called_once_with("foo", params={"a": 1})
+
+
+def test_close_discards_session():
+    pooled = Transport()
+    session = pooled.session
+    pooled.close()
+    assert pooled.session is not session
+
+
+
+class CookieHandler(BaseHTTPRequestHandler):
+    cookies = []
+
+    def do_GET(self):
+        self.cookies.append(self.headers.get("Cookie"))
+        self.send_response(200)
+        self.send_header("Set-Cookie", "sessionid=abc; Path=/")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_server_cookies_are_not_sent_back():
+    server = HTTPServer(("127.0.0.1", 0), CookieHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        url = "http://127.0.0.1:{0}/".format(server.server_port)
+        pooled = Transport(retry=None)
+        pooled.request("get", url)
+        pooled.request("get", url)
+    finally:
+        server.shutdown()
+        thread.join()
+    assert CookieHandler.cookies == [None, None]
@@ -6,6 +6,7 @@ import responses
 from drf_client import utils, settings
 from drf_client.resources import Resource
 from drf_client.exceptions import APIException
+from drf_client.utils import ResponseParser
 from tests.fixtures import authenticate
 from tests.helpers import mock_response
 
@@ -55,3 +56,22 @@ class TestParseResource:
         response = mock_response(ok=True, json_value=data)
         resource = utils.parse_resources(cls=Resource, response=response, many=False)
         assert resource.raw_data == data
+
+    def test_parse_page_allows_empty_results(self):
+        response = mock_response(ok=True, json_value={'count': 0, 'next': None,
+                                                      'results': []})
+        page = ResponseParser().parse_page(response)
+        assert page.results == []
+        assert page.count == 0
+        assert page.has_next is False
+
+    def test_parse_page_without_pagination_info(self):
+        response = mock_response(ok=True, json_value={'results': [{'id': 1}]})
+        page = ResponseParser().parse_page(response)
+        assert page.count is None
+        assert page.has_next is None
+
+    def test_parse_page_errors_on_failed_request(self):
+        response = mock_response(ok=False)
+        with pytest.raises(APIException):
+            ResponseParser().parse_page(response)